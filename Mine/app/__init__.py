@@ -3,35 +3,51 @@ Application factory and initialization.
 Creates and configures the Flask application.
 """
 import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from flask import Flask
-from app.config import current_config
+from app.config import current_config, config_settings
 from app.extensions import init_extensions
 from app.utils.logger import logger
 
+# Static and template folders are fixed for the process lifetime
+_BASEDIR = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
+_STATIC = os.path.join(_BASEDIR, 'static')
+_TEMPLATES = os.path.join(_BASEDIR, 'templates')
+
 def create_app(config=None):
-    """Application factory function."""
-    # Get absolute paths for static and template folders
-    basedir = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
-    static_path = os.path.join(basedir, 'static')
-    template_path = os.path.join(basedir, 'templates')
-    
-    app = Flask(__name__, static_folder=static_path, template_folder=template_path)
+    """Application factory function.
     
-    # Load configuration
+    Apps are memoized per config class; tests that need a fresh app should
+    call ``_build_app.cache_clear()`` between isolation boundaries.
+    """
     if config is None:
         config = current_config
-    app.config.from_object(config)
+    return _build_app(config)
+
+@lru_cache(maxsize=4)
+def _build_app(config):
+    """Build and configure a Flask app for the given config class."""
+    app = Flask(__name__, static_folder=_STATIC, template_folder=_TEMPLATES)
+    
+    # Load configuration
+    app.config.update(config_settings(config))
+    
+    from app.routes import import_blueprints, register_blueprints
     
-    # Initialize extensions
-    init_extensions(app)
+    # Overlap blueprint module imports with extension init; Flask setup
+    # calls (init_app, register_blueprint) stay on this thread
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        blueprints_future = executor.submit(import_blueprints)
+        init_extensions(app)
+        blueprints = blueprints_future.result()
     
-    logger.info(f"Flask app created with config: {config.__name__}")
-    logger.info(f"Templates: {template_path}")
-    logger.info(f"Static: {static_path}")
+    logger.info("Flask app created with config: %s", config.__name__)
+    logger.info("Templates: %s", _TEMPLATES)
+    logger.info("Static: %s", _STATIC)
     
     # Register blueprints
-    from app.routes import register_blueprints
-    register_blueprints(app)
+    register_blueprints(app, blueprints)
     
     return app
 
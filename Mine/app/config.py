@@ -3,18 +3,31 @@ Application configuration module.
 Handles environment variables and application settings.
 """
 import os
-from dotenv import load_dotenv
+from datetime import timedelta
+from functools import lru_cache
+from types import MappingProxyType
 
-load_dotenv()
+# Production env comes from the orchestrator; skip importing dotenv entirely.
+# Variables already set in the environment win over .env values.
+if os.getenv("FLASK_ENV") != "production":
+    from dotenv import load_dotenv
+    load_dotenv()
+
+# Snapshot the environment keys we read, once
+_ENV = {k: os.environ.get(k) for k in ('SECRET_KEY', 'API_KEY', 'ACCESS_TOKEN', 'LOG_LEVEL', 'FLASK_ENV', 'ENABLE_SCHEDULER', 'REDIS_URL')}
 
 class Config:
     """Base configuration."""
     # Flask
-    SECRET_KEY = os.getenv("SECRET_KEY", "dev-key-change-in-production")
+    SECRET_KEY = _ENV["SECRET_KEY"] or "dev-key-change-in-production"
+    
+    # Sessions (Kite access tokens are only good for a trading day)
+    SESSION_PERMANENT = True
+    PERMANENT_SESSION_LIFETIME = timedelta(hours=8)
     
     # API Keys
-    API_KEY = os.getenv("API_KEY")
-    ACCESS_TOKEN = os.getenv("ACCESS_TOKEN")
+    API_KEY = _ENV["API_KEY"]
+    ACCESS_TOKEN = _ENV["ACCESS_TOKEN"]
     
     # Rate Limiting
     RATELIMIT_DEFAULT = "200 per day, 50 per hour"
@@ -23,7 +36,7 @@ class Config:
     CACHE_DURATION = 60  # seconds
     
     # Logging
-    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVEL = _ENV["LOG_LEVEL"] or "INFO"
     LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     
     # Market Hours (IST)
@@ -33,10 +46,19 @@ class Config:
     # Threading
     MAX_WORKERS = 8
     THREAD_POOL_WORKERS = 2
+    
+    # Background scheduler (in-process timer). Every process that enables it
+    # runs the job, so it is opt-in (ENABLE_SCHEDULER=1) on exactly one
+    # process; the single-process dev server turns it on by default
+    ENABLE_SCHEDULER = _ENV["ENABLE_SCHEDULER"] == "1"
+    
+    # Redis for shared caches and server-side sessions (optional)
+    REDIS_URL = _ENV["REDIS_URL"]
 
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
+    ENABLE_SCHEDULER = (_ENV["ENABLE_SCHEDULER"] or "1") == "1"
 
 class ProductionConfig(Config):
     """Production configuration."""
@@ -45,13 +67,16 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration."""
     TESTING = True
+    WTF_CSRF_ENABLED = False
+    ENABLE_SCHEDULER = False
+
+@lru_cache(maxsize=None)
+def config_settings(config):
+    """Return a frozen, flat mapping of a config class's uppercase settings."""
+    return MappingProxyType({key: getattr(config, key) for key in dir(config) if key.isupper()})
 
 # Get configuration based on environment
-config_name = os.getenv("FLASK_ENV", "development")
-config_map = {
-    "development": DevelopmentConfig,
-    "production": ProductionConfig,
-    "testing": TestingConfig,
-}
-
-current_config = config_map.get(config_name, DevelopmentConfig)
+config_name = _ENV["FLASK_ENV"] or "development"
+current_config = (ProductionConfig if config_name == "production" else
+                  TestingConfig if config_name == "testing" else
+                  DevelopmentConfig)
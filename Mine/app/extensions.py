@@ -1,22 +1,72 @@
 """
 Flask extensions initialization.
 All Flask extensions are initialized here to avoid circular imports.
+
+Extension packages are imported on first use; ``limiter`` and ``csrf``
+are resolved through the module ``__getattr__`` below.
 """
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
-from flask_wtf.csrf import CSRFProtect
+import threading
+
+_limiter = None
+_csrf = None
+_initialized = False
+_init_lock = threading.Lock()
+
+def _ensure():
+    """Import and construct the extensions (without app binding) once."""
+    global _limiter, _csrf, _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        from flask_limiter import Limiter
+        from flask_limiter.util import get_remote_address
+        from flask_wtf.csrf import CSRFProtect
+
+        _limiter = Limiter(key_func=get_remote_address)
+        _csrf = CSRFProtect()
+        _initialized = True
 
-# Initialize extensions (without app binding)
-limiter = Limiter(key_func=get_remote_address)
-csrf = CSRFProtect()
+def __getattr__(name):
+    if name == 'limiter':
+        _ensure()
+        return _limiter
+    if name == 'csrf':
+        _ensure()
+        return _csrf
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def init_extensions(app):
     """Initialize all Flask extensions with the app."""
-    limiter.init_app(app)
-    csrf.init_app(app)
-    
-    # Initialize scheduler for recurring tasks
-    from app.scheduler import init_scheduler
-    init_scheduler(app)
+    _ensure()
+    _limiter.init_app(app)
+    if app.config.get('WTF_CSRF_ENABLED', True):
+        _csrf.init_app(app)
     
+    # Server-side sessions when Redis is configured; the cookie then only holds the sid
+    if app.config.get('REDIS_URL'):
+        _init_server_sessions(app)
+
+    # Initialize scheduler for recurring tasks (module import is deferred)
+    if app.config.get('ENABLE_SCHEDULER'):
+        from app.scheduler import init_scheduler
+        init_scheduler(app)
+
     return app
+
+def _init_server_sessions(app):
+    """Store sessions in Redis via Flask-Session (falls back to cookie sessions)."""
+    from app.utils.cache import get_redis
+    client = get_redis()
+    try:
+        from flask_session import Session
+    except ImportError:
+        client = None
+    if client is None:
+        app.logger.warning("REDIS_URL is set but Flask-Session/redis is unavailable; using cookie sessions")
+        return
+    app.config.setdefault('SESSION_TYPE', 'redis')
+    app.config.setdefault('SESSION_REDIS', client)
+    app.config.setdefault('SESSION_KEY_PREFIX', 'mine:session:')
+    Session(app)
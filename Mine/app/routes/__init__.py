@@ -1,14 +1,30 @@
 """Routes package."""
-from flask import Blueprint
-
-def register_blueprints(app):
-    """Register all blueprints with the Flask app."""
-    # Import blueprints
-    from app.routes.pages import pages_bp
-    from app.routes.api import api_bp
-    from app.routes.auth import auth_bp
-    
-    # Register blueprints
-    app.register_blueprint(pages_bp)
-    app.register_blueprint(api_bp, url_prefix='/api')
-    app.register_blueprint(auth_bp, url_prefix='/auth')
+import importlib
+
+# (import path, blueprint attribute, url prefix)
+BLUEPRINTS = (
+    ('app.routes.pages', 'pages_bp', None),
+    ('app.routes.api', 'api_bp', '/api'),
+    ('app.routes.auth', 'auth_bp', '/auth'),
+)
+
+
+def import_blueprints():
+    """Import all blueprint modules; returns (blueprint, url_prefix) pairs."""
+    return [
+        (getattr(importlib.import_module(import_path), attr), url_prefix)
+        for import_path, attr, url_prefix in BLUEPRINTS
+    ]
+
+
+def register_blueprints(app, blueprints=None):
+    """Register all blueprints with the Flask app.
+
+    ``blueprints`` may carry the result of an earlier ``import_blueprints()``
+    call (e.g. one run on a worker thread); registration itself always
+    happens on the calling thread.
+    """
+    if blueprints is None:
+        blueprints = import_blueprints()
+    for blueprint, url_prefix in blueprints:
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
@@ -1,60 +1,190 @@
 """API routes for trading data endpoints."""
+import hashlib
+import heapq
+import os
+import time
 from flask import Blueprint, request, jsonify, session, Response
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Dict, Any, Optional, Union
+from functools import lru_cache, wraps
+from operator import itemgetter
+from typing import TYPE_CHECKING, Dict, Any, Optional, Union
+
+import orjson
 
 from app.utils.logger import logger
+from app.utils.cache import cpr_filter_cache, options_strikes_cache
+from app.utils.nfo_cache import get_nfo
 from app.extensions import csrf, limiter
+# Service modules (pandas/numpy-backed) are imported inside the handlers
+# that use them, so importing this blueprint stays cheap at startup
 
+if TYPE_CHECKING:
+    from kiteconnect import KiteConnect
 
 api_bp = Blueprint('api', __name__)
 
+# Shared pool for overlapping independent Kite round-trips within a request
+_IO_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="kite-io")
+
 # Type alias for API responses
 # Flask's jsonify returns Response, optionally with status code tuple
 EndpointResponse = Union[Response, tuple[Response, int]]
 
 
+@lru_cache(maxsize=64)
+def _build_kite(api_key: str, access_token: str) -> 'KiteConnect':
+    """Build a KiteConnect client; cached for the lifetime of an access token."""
+    from kiteconnect import KiteConnect
+    # Mount a pooled HTTPAdapter so TLS connections to api.kite.trade are reused
+    kite = KiteConnect(api_key=api_key, pool={'pool_connections': 16, 'pool_maxsize': 32})
+    kite.set_access_token(access_token)
+    return kite
+
+
 def get_kite() -> Optional[Any]:
-    """Get authenticated KiteConnect instance from session or create new one."""
+    """Get authenticated KiteConnect instance for the session's access token."""
     try:
         # Don't store KiteConnect in session as it's not JSON serializable
-        # Instead, create a new instance each time from credentials in session
-        from kiteconnect import KiteConnect
-        import os
-        
-        api_key = os.getenv('API_KEY')
+        # Instead, reuse a cached instance keyed by the session credentials
+        api_key = os.environ.get('API_KEY')
         access_token = session.get('access_token')
         
         if not api_key or not access_token:
             return None
         
-        kite = KiteConnect(api_key=api_key)
-        kite.set_access_token(access_token)
-        return kite
+        return _build_kite(api_key, access_token)
     except Exception as e:
-        logger.error(f"Failed to initialize KiteConnect: {e}")
+        logger.error("Failed to initialize KiteConnect: %s", e)
         return None
 
 
-def check_auth() -> Optional[tuple]:
-    """Check if user is authenticated. Returns error tuple if not."""
-    if 'access_token' not in session or not session.get('access_token'):
-        return jsonify({
-            'success': False,
-            'error': 'Authentication required. Please login first at /auth/login',
-            'auth_error': True
-        }), 401
+# Common error bodies, serialized once. A fresh Response wraps them per
+# request since after_request hooks (session cookie, limiter) mutate headers.
+_AUTH_ERR_BODY = orjson.dumps({
+    'success': False,
+    'error': 'Authentication required. Please login first at /auth/login',
+    'auth_error': True
+})
+_KITE_INIT_ERR_BODY = orjson.dumps({'success': False, 'error': 'KiteConnect initialization failed.'})
+
+
+def kite_init_error() -> Response:
+    """401 response for a missing/failed KiteConnect client."""
+    return Response(_KITE_INIT_ERR_BODY, status=401, mimetype='application/json')
+
+
+def check_auth() -> Optional[Response]:
+    """Check if user is authenticated. Returns error response if not."""
+    if not session.get('access_token'):
+        return Response(_AUTH_ERR_BODY, status=401, mimetype='application/json')
     return None
 
 
+# Index symbols whose NSE instrument key differs from the symbol
+_SYMBOL_MAP = {
+    'NIFTY': 'NSE:NIFTY 50',
+    'BANKNIFTY': 'NSE:NIFTY BANK',
+    'FINNIFTY': 'NSE:NIFTY FIN SERVICE',
+}
+
+
+@lru_cache(maxsize=512)
 def get_instrument_key(symbol: str) -> str:
     """Get the instrument key for a symbol."""
     symbol = symbol.upper()
-    mapping = {
-        'NIFTY': 'NSE:NIFTY 50'
-    }
-    return mapping.get(symbol, f'NSE:{symbol}')
+    return _SYMBOL_MAP.get(symbol, f'NSE:{symbol}')
+
+
+def _json_body() -> Any:
+    """Parse the request body with orjson; an empty or malformed body yields {}."""
+    raw = request.get_data(cache=False)
+    if not raw:
+        return {}
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return {}
+
+
+def etagged(max_age: int = 60):
+    """Add an ETag to successful JSON responses and answer If-None-Match with 304.
+
+    ``max_age=0`` sends ``no-cache`` so clients revalidate on every request
+    (for bodies carrying live prices).
+    """
+    cache_control = f'private, max-age={max_age}' if max_age else 'private, no-cache'
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            response = view(*args, **kwargs)
+            if not isinstance(response, Response) or response.status_code != 200 or response.is_streamed:
+                return response
+            etag = hashlib.blake2b(response.get_data(), digest_size=8).hexdigest()
+            if request.if_none_match.contains(etag):
+                not_modified = Response(status=304)
+                not_modified.set_etag(etag)
+                return not_modified
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
+
+
+def _ojson(obj: Any, status: int = 200) -> Response:
+    """Serialize a large payload with orjson (datetimes handled natively)."""
+    return Response(
+        orjson.dumps(obj, option=orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY),
+        status=status,
+        mimetype='application/json'
+    )
+
+
+# Candle counts above this are streamed in chunks rather than encoded in one go
+_STREAM_THRESHOLD = 10_000
+_STREAM_CHUNK = 1_000
+
+
+def _stream_candles(candles: list):
+    """Yield a {'success', 'count', 'data'} JSON document chunk by chunk."""
+    yield b'{"success":true,"count":%d,"data":[' % len(candles)
+    for i in range(0, len(candles), _STREAM_CHUNK):
+        chunk = orjson.dumps(candles[i:i + _STREAM_CHUNK], option=orjson.OPT_NAIVE_UTC)
+        yield (b',' if i else b'') + chunk[1:-1]
+    yield b']}'
+
+
+# {name: token} for NFO futures, rebuilt once per trading day
+_NFO_FUT_INDEX: Dict[str, Any] = {'day': None, 'index': {}}
+
+
+def _nfo_futures_index(kite) -> Dict[str, int]:
+    """Get the NFO futures token index, fetching instruments at most once a day."""
+    day = datetime.now().strftime('%Y%m%d')
+    if _NFO_FUT_INDEX['day'] != day:
+        index: Dict[str, int] = {}
+        for inst in get_nfo(kite):
+            if inst.get('segment') == 'NFO-FUT' and inst.get('name'):
+                # Keep the first (nearest-expiry) contract, as the old scan did
+                index.setdefault(inst['name'], inst['instrument_token'])
+        _NFO_FUT_INDEX.update(day=day, index=index)
+    return _NFO_FUT_INDEX['index']
+
+
+# /symbols payload never changes, so serialize it once
+_SYMBOLS_BODY = orjson.dumps({'success': True, 'symbols': ['NIFTY']})
+_EMPTY_FO_STOCKS_BODY = orjson.dumps({'success': True, 'stocks': []})
+
+
+def _cached_fo_stocks_body(kite) -> bytes:
+    """Get the serialized /fo-stocks payload, cached for the cpr_filter_cache TTL (5 min)."""
+    def load() -> bytes:
+        from cpr_filter_service import CPRFilterService
+        return orjson.dumps({'success': True, 'stocks': CPRFilterService(kite_instance=kite).get_fo_stocks()})
+    
+    return cpr_filter_cache.get_or_compute('fo_stocks_body', load, should_cache=lambda body: body != _EMPTY_FO_STOCKS_BODY)
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -77,30 +207,23 @@ def get_underlying_price() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
         instrument_key = get_instrument_key(symbol)
         ltp = None
         previous_close = None
         
+        # quote() carries both last_price and ohlc, so one round-trip serves both
         try:
-            ltp_data = current_kite.ltp([instrument_key])
-            ltp = float(ltp_data.get(instrument_key, {}).get('last_price', 0.0))
-        except Exception as e:
-            logger.warning(f"Error fetching LTP for {symbol}: {e}")
-        
-        try:
-            quote_data = current_kite.quote([instrument_key])
-            previous_close = float(quote_data.get(instrument_key, {}).get('ohlc', {}).get('close', 0.0))
+            quote = current_kite.quote([instrument_key]).get(instrument_key, {})
+            ltp = float(quote.get('last_price', 0.0))
+            previous_close = float(quote.get('ohlc', {}).get('close', 0.0))
         except Exception as e:
-            logger.warning(f"Error fetching previous close for {symbol}: {e}")
+            logger.warning("Error fetching quote for %s: %s", symbol, e)
         
-        requested_price = ltp if price_source == 'ltp' else previous_close
-        if not requested_price and ltp:
-            requested_price = ltp
-        if not requested_price and previous_close:
-            requested_price = previous_close
+        # Fall back to whichever price is available
+        requested_price = (ltp if price_source == 'ltp' else previous_close) or ltp or previous_close
         
         return jsonify({
             'success': True,
@@ -111,11 +234,12 @@ def get_underlying_price() -> EndpointResponse:
             'price_source': price_source
         })
     except Exception as e:
-        logger.error(f"Error fetching underlying price for {symbol}: {e}")
+        logger.error("Error fetching underlying price for %s: %s", symbol, e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @api_bp.route('/symbols', methods=['GET'])
+@etagged(max_age=60)
 def get_symbols() -> EndpointResponse:
     """Get list of available symbols."""
     auth_error = check_auth()
@@ -124,18 +248,13 @@ def get_symbols() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
         # Return only NIFTY 50
-        symbols = ['NIFTY']
-        
-        return jsonify({
-            'success': True,
-            'symbols': symbols
-        })
+        return Response(_SYMBOLS_BODY, mimetype='application/json')
     except Exception as e:
-        logger.error(f"Error fetching symbols: {e}")
+        logger.error("Error fetching symbols: %s", e)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -147,6 +266,7 @@ def get_symbols() -> EndpointResponse:
 
 
 @api_bp.route('/fo-stocks', methods=['GET'])
+@etagged(max_age=60)
 def get_fo_stocks() -> EndpointResponse:
     """Get list of F&O stocks available for trading."""
     auth_error = check_auth()
@@ -155,20 +275,12 @@ def get_fo_stocks() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
-        from cpr_filter_service import CPRFilterService
-        
-        cpr_service = CPRFilterService(kite_instance=current_kite)
-        fo_stocks = cpr_service.get_fo_stocks()
-        
-        return jsonify({
-            'success': True,
-            'stocks': fo_stocks
-        })
+        return Response(_cached_fo_stocks_body(current_kite), mimetype='application/json')
     except Exception as e:
-        logger.error(f"Error fetching F&O stocks: {e}")
+        logger.error("Error fetching F&O stocks: %s", e)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -181,6 +293,7 @@ def get_fo_stocks() -> EndpointResponse:
 
 @api_bp.route('/options-init', methods=['GET'])
 @limiter.exempt  # Exempt from rate limiting - called on page load
+@etagged(max_age=0)  # Body carries the live LTP: always revalidate
 def get_options_init() -> EndpointResponse:
     """
     FAST endpoint - returns strikes immediately using cached NFO instruments and disk cache.
@@ -188,11 +301,28 @@ def get_options_init() -> EndpointResponse:
     
     Performance optimizations:
     - Uses disk-cached NFO instruments (8-10s on first call, <500ms on cache hit)
+    - Caches resolved strikes per (symbol, price_source) for 5 minutes
     - Skips PDH/PDL and LTP on initial load (can be fetched separately)
     - Returns immediately with strikes for fast UI initialization
     """
-    import time as time_module
-    start_time = time_module.time()
+    return _options_init_impl()
+
+
+def _cached_strikes(current_kite, symbol: str, price_source: str) -> Dict[str, Any]:
+    """Resolve strikes for a symbol, cached in options_strikes_cache (5 min TTL)."""
+    key = f"{symbol.upper()}:{price_source}"
+    
+    def load() -> Dict[str, Any]:
+        # Skip pricing in service - the caller fetches it once to avoid duplication
+        from service.options_chart_service import OptionsChartService
+        return OptionsChartService(current_kite).get_strikes_for_symbol(symbol, price_source, skip_pricing=True)
+    
+    return options_strikes_cache.get_or_compute(key, load, should_cache=lambda result: bool(result.get('strikes')))
+
+
+def _options_init_impl() -> EndpointResponse:
+    """Shared body of /options-init and /options-strikes."""
+    start_ns = time.perf_counter_ns()
     
     auth_error = check_auth()
     if auth_error:
@@ -206,15 +336,14 @@ def get_options_init() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
-        from service.options_chart_service import OptionsChartService
-        
-        chart_service = OptionsChartService(current_kite)
+        # Fire the price fetch now so it overlaps with strike resolution
+        instrument_key = get_instrument_key(symbol)
+        price_future = _IO_POOL.submit(current_kite.quote, [instrument_key])
         
-        # Skip pricing in service - fetch it once here to avoid duplication
-        result = chart_service.get_strikes_for_symbol(symbol, price_source, skip_pricing=True)
+        result = _cached_strikes(current_kite, symbol, price_source)
         
         if 'strikes' not in result:
             return jsonify({'success': False, 'error': 'Could not retrieve strike data.'}), 500
@@ -231,32 +360,30 @@ def get_options_init() -> EndpointResponse:
         requested_source_label = ' (Close)'
         
         try:
-            instrument_key = get_instrument_key(symbol)
-            
             if price_source == 'ltp':
                 try:
-                    ltp_data = current_kite.ltp([instrument_key])
-                    requested_price = float(ltp_data.get(instrument_key, {}).get('last_price', base_price or 0.0))
+                    quote_data = price_future.result(timeout=5)
+                    requested_price = float(quote_data.get(instrument_key, {}).get('last_price', base_price or 0.0))
                     requested_source_label = ' (LTP)'
                 except Exception as e:
-                    logger.warning(f"Error fetching LTP for {symbol}: {e}")
+                    logger.warning("Error fetching LTP for %s: %s", symbol, e)
                     requested_price = base_price or 0.0
                     requested_source_label = ' (LTP)'
             else:  # previous_close
                 try:
-                    quote_data = current_kite.quote([instrument_key])
+                    quote_data = price_future.result(timeout=5)
                     requested_price = float(quote_data.get(instrument_key, {}).get('ohlc', {}).get('close', base_price or 0.0))
                     requested_source_label = ' (Close)'
                 except Exception as e:
-                    logger.warning(f"Error fetching previous close for {symbol}: {e}")
+                    logger.warning("Error fetching previous close for %s: %s", symbol, e)
                     requested_price = base_price or 0.0
                     requested_source_label = ' (Close)'
         except Exception as e:
-            logger.warning(f"Error fetching price data for {symbol}: {e}")
+            logger.warning("Error fetching price data for %s: %s", symbol, e)
             requested_price = base_price or 0.0
         
-        total_time = time_module.time() - start_time
-        logger.info(f"✓ options-init({symbol}) completed in {total_time:.2f}s")
+        elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        logger.info("✓ options-init(%s) completed in %d ms", symbol, elapsed_ms)
         
         return jsonify({
             'success': True,
@@ -271,7 +398,7 @@ def get_options_init() -> EndpointResponse:
             }
         })
     except Exception as e:
-        logger.error(f"Error in options-init: {e}", exc_info=True)
+        logger.error("Error in options-init: %s", e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -284,8 +411,8 @@ def get_options_init() -> EndpointResponse:
 
 @api_bp.route('/options-strikes', methods=['GET'])
 def get_options_strikes() -> EndpointResponse:
-    """Legacy endpoint - redirects to /api/options-init"""
-    return get_options_init()
+    """Legacy endpoint - same response as /api/options-init"""
+    return _options_init_impl()
 
 
 @api_bp.route('/options-chart-data', methods=['POST'])
@@ -314,25 +441,23 @@ def get_options_chart_data() -> EndpointResponse:
         }
         Response time: 3-5 seconds (needs token lookup from NFO cache)
     """
-    import time as time_module
-    start_time = time_module.time()
+    start_ns = time.perf_counter_ns()
     
     auth_error = check_auth()
     if auth_error:
         return auth_error
     
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     
     if not isinstance(data, dict):
         return jsonify({'success': False, 'error': 'Invalid request body format (must be JSON)'}), 400
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
         from service.options_chart_service import OptionsChartService
-        
         chart_service = OptionsChartService(current_kite)
         
         # Prefer tokens (FAST PATH - no lookups needed)
@@ -363,10 +488,10 @@ def get_options_chart_data() -> EndpointResponse:
             ce_strike = float(ce_strike_str)
             pe_strike = float(pe_strike_str)
             
-            lookup_start = time_module.time()
+            lookup_start = time.perf_counter()
             ce_token, pe_token = chart_service.get_tokens_for_strikes(symbol, ce_strike, pe_strike)
-            lookup_time = time_module.time() - lookup_start
-            logger.info(f"Token lookup for {symbol} {ce_strike}C/{pe_strike}P took {lookup_time:.2f}s")
+            lookup_time = time.perf_counter() - lookup_start
+            logger.info("Token lookup for %s %sC/%sP took %.2fs", symbol, ce_strike, pe_strike, lookup_time)
             
             if not ce_token or not pe_token:
                 return jsonify({
@@ -376,24 +501,24 @@ def get_options_chart_data() -> EndpointResponse:
         
         ce_data, pe_data = chart_service.get_chart_data(ce_token, pe_token, timeframe, use_cache=True)
         
-        combined_data = []
-        for candle in ce_data:
-            combined_data.append({**candle, 'type': 'CE'})
-        for candle in pe_data:
-            combined_data.append({**candle, 'type': 'PE'})
+        # Tag copies (the service may hand back candles it still caches) and
+        # merge the two already time-ordered series instead of re-sorting
+        combined_data = list(heapq.merge(
+            ({**candle, 'type': 'CE'} for candle in ce_data),
+            ({**candle, 'type': 'PE'} for candle in pe_data),
+            key=itemgetter('date'),
+        ))
         
-        combined_data.sort(key=lambda x: x['date'])
+        elapsed_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
+        logger.info("✓ options-chart-data completed in %d ms", elapsed_ms)
         
-        elapsed = time_module.time() - start_time
-        logger.info(f"✓ options-chart-data completed in {elapsed:.2f}s")
-        
-        return jsonify({
+        return _ojson({
             'success': True,
             'data': combined_data,
-            'response_time_ms': int(elapsed * 1000)
+            'response_time_ms': elapsed_ms
         })
     except Exception as e:
-        logger.error(f"Error fetching chart data: {e}", exc_info=True)
+        logger.error("Error fetching chart data: %s", e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -418,18 +543,17 @@ def get_options_pdh_pdl() -> EndpointResponse:
     if auth_error:
         return auth_error
     
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     
     if not isinstance(data, dict):
         return jsonify({'success': False, 'error': 'Invalid request body format (must be JSON)'}), 400
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
         from service.options_chart_service import OptionsChartService
-        
         chart_service = OptionsChartService(current_kite)
         
         # PREFERRED METHOD: Get tokens from request
@@ -462,14 +586,14 @@ def get_options_pdh_pdl() -> EndpointResponse:
         # Fetch PDH/PDL using tokens
         pdh_pdl = chart_service.get_pdh_pdl(ce_token, pe_token)
         
-        return jsonify({
+        return _ojson({
             'success': True,
             'pdh_pdl': pdh_pdl,
             'ce_token': ce_token,
             'pe_token': pe_token
         })
     except Exception as e:
-        logger.error(f"Error fetching PDH/PDL: {e}", exc_info=True)
+        logger.error("Error fetching PDH/PDL: %s", e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -496,7 +620,7 @@ def get_cpr_filter_results() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
         # Verify kite has access token
@@ -508,9 +632,8 @@ def get_cpr_filter_results() -> EndpointResponse:
                 'auth_error': True
             }), 401
         
-        from cpr_filter_service import CPRFilterService
-        
         logger.info("Initializing CPRFilterService...")
+        from cpr_filter_service import CPRFilterService
         cpr_service = CPRFilterService(kite_instance=current_kite)
         
         logger.info("Starting CPR filter stocks processing...")
@@ -521,13 +644,16 @@ def get_cpr_filter_results() -> EndpointResponse:
 
         logger.info(
             "CPR filter completed. "
-            f"Found {len(signals)} primary signals, "
-            f"{len(weekly_cross.get('crossed_above', []))} crossed above weekly CPR, "
-            f"{len(weekly_cross.get('crossed_below', []))} crossed below weekly CPR."
+            "Found %d primary signals, "
+            "%d crossed above weekly CPR, "
+            "%d crossed below weekly CPR.",
+            len(signals),
+            len(weekly_cross.get('crossed_above', [])),
+            len(weekly_cross.get('crossed_below', []))
         )
-        return jsonify({'success': True, 'data': signals, 'weekly_cross': weekly_cross})
+        return _ojson({'success': True, 'data': signals, 'weekly_cross': weekly_cross})
     except Exception as e:
-        logger.error(f"Error in CPR filter: {type(e).__name__}: {e}", exc_info=True)
+        logger.error("Error in CPR filter: %s: %s", type(e).__name__, e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str or 'invalid' in error_str:
             return jsonify({
@@ -546,7 +672,7 @@ def notify_whatsapp() -> EndpointResponse:
     if auth_error:
         return auth_error
 
-    data = request.get_json(silent=True) or {}
+    data = _json_body()
     message = (data.get('message') or '').strip()
     to_number = (data.get('to') or '').strip()
 
@@ -555,7 +681,6 @@ def notify_whatsapp() -> EndpointResponse:
 
     try:
         from service.whatsapp_service import WhatsAppService
-
         wa_service = WhatsAppService()
         result = wa_service.send_text(message, to_number if to_number else None)
 
@@ -563,7 +688,7 @@ def notify_whatsapp() -> EndpointResponse:
             return jsonify({'success': True})
         return jsonify({'success': False, 'error': result.get('error', 'WhatsApp send failed')}), 500
     except Exception as e:
-        logger.error(f"WhatsApp notify error: {e}", exc_info=True)
+        logger.error("WhatsApp notify error: %s", e, exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
@@ -576,11 +701,9 @@ def get_instrument_token() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
-        from service.kite_service import KiteService
-        
         symbol = request.args.get('symbol', '').upper()
         symbol_type = request.args.get('type', 'fno').lower()
         fno_type = request.args.get('fno_type', 'futures').lower()
@@ -592,10 +715,11 @@ def get_instrument_token() -> EndpointResponse:
         
         if symbol == 'NIFTY':
             try:
+                from service.kite_service import KiteService
                 kite_service = KiteService(kite_instance=current_kite)
                 instrument_token = kite_service.get_instrument_token(symbol)
             except Exception as e:
-                logger.error(f"Error getting index token for {symbol}: {e}")
+                logger.error("Error getting index token for %s: %s", symbol, e)
                 return jsonify({
                     'success': False,
                     'error': f'Error fetching token for index {symbol}: {str(e)}'
@@ -603,13 +727,9 @@ def get_instrument_token() -> EndpointResponse:
         else:
             if fno_type == 'futures':
                 try:
-                    instruments = current_kite.instruments('NFO')
-                    for inst in instruments:
-                        if inst.get('name') == symbol and inst.get('segment') == 'NFO-FUT':
-                            instrument_token = inst.get('instrument_token')
-                            break
+                    instrument_token = _nfo_futures_index(current_kite).get(symbol)
                 except Exception as e:
-                    logger.error(f"Error fetching NFO instruments: {e}")
+                    logger.error("Error fetching NFO instruments: %s", e)
                     error_str = str(e).lower()
                     if 'access_token' in error_str or 'unauthorized' in error_str:
                         return jsonify({
@@ -637,7 +757,7 @@ def get_instrument_token() -> EndpointResponse:
                 'error': f'Instrument token not found for symbol: {symbol}'
             }), 404
     except Exception as e:
-        logger.error(f"Error fetching instrument token: {e}", exc_info=True)
+        logger.error("Error fetching instrument token: %s", e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -658,10 +778,10 @@ def get_historical_data() -> EndpointResponse:
     
     current_kite = get_kite()
     if not current_kite:
-        return jsonify({'success': False, 'error': 'KiteConnect initialization failed.'}), 401
+        return kite_init_error()
     
     try:
-        data = request.get_json()
+        data = _json_body()
         if not data:
             return jsonify({'success': False, 'error': 'Request body must be JSON'}), 400
         
@@ -676,7 +796,7 @@ def get_historical_data() -> EndpointResponse:
                 'error': 'Missing required parameters: instrument_token, from_date, to_date'
             }), 400
         
-        logger.info(f"Fetching historical data: token={instrument_token}, from={from_date}, to={to_date}, interval={interval}")
+        logger.info("Fetching historical data: token=%s, from=%s, to=%s, interval=%s", instrument_token, from_date, to_date, interval)
         
         try:
             candles = current_kite.historical_data(
@@ -686,7 +806,7 @@ def get_historical_data() -> EndpointResponse:
                 interval=interval
             )
         except Exception as kite_error:
-            logger.error(f"KiteConnect historical_data error: {kite_error}")
+            logger.error("KiteConnect historical_data error: %s", kite_error)
             error_str = str(kite_error).lower()
             if 'access_token' in error_str or 'unauthorized' in error_str:
                 return jsonify({
@@ -703,25 +823,20 @@ def get_historical_data() -> EndpointResponse:
                 'message': 'No data available for the given parameters'
             })
         
-        formatted_data = []
+        # Kite candles already carry the response fields; only 'oi' may be missing
         for candle in candles:
-            formatted_data.append({
-                'date': candle['date'],
-                'open': candle['open'],
-                'high': candle['high'],
-                'low': candle['low'],
-                'close': candle['close'],
-                'volume': candle['volume'],
-                'oi': candle.get('oi', 0)
-            })
+            candle.setdefault('oi', 0)
         
-        return jsonify({
+        if len(candles) > _STREAM_THRESHOLD:
+            return Response(_stream_candles(candles), mimetype='application/json')
+        
+        return _ojson({
             'success': True,
-            'data': formatted_data,
-            'count': len(formatted_data)
+            'data': candles,
+            'count': len(candles)
         })
     except Exception as e:
-        logger.error(f"Error fetching historical data: {e}", exc_info=True)
+        logger.error("Error fetching historical data: %s", e, exc_info=True)
         error_str = str(e).lower()
         if 'access_token' in error_str or 'unauthorized' in error_str:
             return jsonify({
@@ -744,7 +859,7 @@ def run_strategy_backtest() -> EndpointResponse:
                 'message': 'Failed to initialize KiteConnect. Check API keys or login status.'
             }), 401
         
-        data = request.get_json(silent=True) or {}
+        data = _json_body()
         
         if not isinstance(data, dict):
             return jsonify({'status': 'error', 'message': 'Invalid request body format (must be JSON)'}), 400
@@ -768,7 +883,7 @@ def run_strategy_backtest() -> EndpointResponse:
             'data': strategy.entry_exit_log
         })
     except Exception as e:
-        logger.error(f"Error running strategy backtest: {e}")
+        logger.error("Error running strategy backtest: %s", e)
         if "token" in str(e).lower() or "auth" in str(e).lower():
             return jsonify({
                 'status': 'error',
@@ -795,7 +910,7 @@ def place_live_order() -> EndpointResponse:
         return auth_error
     
     try:
-        data = request.get_json()
+        data = _json_body()
         option_type = data.get('option_type')
         strike = data.get('strike')
         symbol = data.get('symbol', 'NIFTY')
@@ -824,14 +939,14 @@ def place_live_order() -> EndpointResponse:
         )
         
         if result['success']:
-            logger.info(f"✅ Order placed via API: {option_type} {strike} | Order ID: {result['order_id']}")
+            logger.info("✅ Order placed via API: %s %s | Order ID: %s", option_type, strike, result['order_id'])
             return jsonify(result), 200
         else:
-            logger.error(f"❌ Order placement failed: {result['error']}")
+            logger.error("❌ Order placement failed: %s", result['error'])
             return jsonify(result), 400
     
     except Exception as e:
-        logger.error(f"Error in place_live_order endpoint: {e}", exc_info=True)
+        logger.error("Error in place_live_order endpoint: %s", e, exc_info=True)
         return jsonify({
             'success': False,
             'error': f'Server error: {str(e)}'
@@ -847,5 +962,5 @@ def not_found(error):
 @api_bp.errorhandler(500)
 def server_error(error):
     """Handle 500 errors."""
-    logger.error(f"Server error: {error}")
+    logger.error("Server error: %s", error)
     return jsonify({'error': 'Internal server error'}), 500
@@ -1,12 +1,27 @@
 """Authentication routes."""
-from flask import Blueprint, redirect, request, session, url_for, jsonify
-from kiteconnect import KiteConnect
+from flask import Blueprint, Response, redirect, request, session, url_for, jsonify
 import os
+
+import orjson
+
 from app.utils.logger import logger
+from app.utils.cache import token_store
 from app.config import current_config
 
 auth_bp = Blueprint('auth', __name__)
 
+
+def _kite_for(api_key: str):
+    """Fresh KiteConnect client for one OAuth step.
+
+    Never shared: generate_session() stores the user's access token on the
+    client it is called on.
+    """
+    # kiteconnect is only needed by /login and /callback; keep it off worker boot
+    from kiteconnect import KiteConnect
+    return KiteConnect(api_key=api_key)
+
+
 @auth_bp.route('/login')
 def login():
     """Redirect to Zerodha Kite OAuth login."""
@@ -18,20 +33,18 @@ def login():
         return jsonify({'error': 'API_KEY not configured'}), 500
     
     try:
-        # Initialize KiteConnect
-        kite = KiteConnect(api_key=api_key)
+        kite = _kite_for(api_key)
         
         # Get login URL for OAuth
         login_url = kite.login_url()
-        logger.info(f"Redirecting to Zerodha login: {login_url}")
+        logger.info("Redirecting to Zerodha login: %s", login_url)
         
         # Store API key in session for use in callback
         session['api_key'] = api_key
-        session.permanent = True
         
         return redirect(login_url)
     except Exception as e:
-        logger.error(f"Error during login: {e}")
+        logger.error("Error during login: %s", e)
         return jsonify({'error': f'Login failed: {str(e)}'}), 500
 
 
@@ -44,7 +57,7 @@ def callback():
         logger.warning("No request_token received in callback")
         return redirect(url_for('pages.index'))
     
-    logger.info(f"Callback received with request_token: {request_token}")
+    logger.info("Callback received with request_token: %s", request_token)
     
     try:
         api_key = session.get('api_key') or os.getenv('API_KEY')
@@ -54,8 +67,7 @@ def callback():
             logger.error("API credentials not configured")
             return jsonify({'error': 'API credentials not configured'}), 500
         
-        # Initialize KiteConnect
-        kite = KiteConnect(api_key=api_key)
+        kite = _kite_for(api_key)
         
         # Generate session (exchange request_token for access_token)
         data = kite.generate_session(request_token, api_secret=api_secret)
@@ -64,18 +76,20 @@ def callback():
         # Store in session
         session['access_token'] = access_token
         session['request_token'] = request_token
+        # Cookie sessions need the flag on the session itself (SESSION_PERMANENT
+        # only covers server-side sessions); this response re-signs it anyway
         session.permanent = True
         
         logger.info("Session generated successfully, access_token stored")
-        logger.info(f"User authenticated with access_token: {access_token[:20]}...")
+        logger.info("User authenticated with access_token: %s...", access_token[:20])
         
-        # Store in environment for later use
-        os.environ['ACCESS_TOKEN'] = access_token
+        # Share with other workers (Redis-backed when REDIS_URL is set)
+        token_store.set(api_key, access_token)
         
         return redirect(url_for('pages.index'))
     
     except Exception as e:
-        logger.error(f"Error during callback: {e}", exc_info=True)
+        logger.error("Error during callback: %s", e, exc_info=True)
         return jsonify({'error': f'Authentication failed: {str(e)}'}), 500
 
 
@@ -87,14 +101,25 @@ def logout():
     return redirect(url_for('pages.index'))
 
 
+# /status bodies for each (authenticated, has_request_token) state, serialized once
+_STATUS_BODIES = {
+    (authenticated, has_request_token): orjson.dumps({
+        'authenticated': authenticated,
+        'has_access_token': authenticated,
+        'has_request_token': has_request_token
+    })
+    for authenticated in (False, True)
+    for has_request_token in (False, True)
+}
+
+
 @auth_bp.route('/status')
 def status():
-    """Check authentication status."""
-    access_token = session.get('access_token') or os.getenv('ACCESS_TOKEN')
-    is_authenticated = bool(access_token)
+    """Check authentication status (pollers may reuse the answer for 5s)."""
+    access_token = session.get('access_token') or token_store.get(current_config.API_KEY or '')
+    body = _STATUS_BODIES[bool(access_token), bool(session.get('request_token'))]
     
-    return jsonify({
-        'authenticated': is_authenticated,
-        'has_access_token': is_authenticated,
-        'has_request_token': bool(session.get('request_token'))
-    })
+    # Fresh Response per request: after_request hooks mutate headers
+    response = Response(body, mimetype='application/json')
+    response.headers['Cache-Control'] = 'private, max-age=5'
+    return response
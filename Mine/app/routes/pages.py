@@ -1,32 +1,55 @@
 """Page routes for rendering templates."""
-from flask import Blueprint, render_template
+import hashlib
+from typing import Dict, Tuple
+
+from flask import Blueprint, Response, current_app, render_template, request
 
 pages_bp = Blueprint('pages', __name__)
 
+# Pages only vary by route, so each is rendered once: {template: (html, etag)}
+_RENDERED: Dict[str, Tuple[str, str]] = {}
+
+def _static_page(template: str) -> Response:
+    """Serve a pre-rendered page with a strong ETag, answering If-None-Match with 304."""
+    cached = _RENDERED.get(template)
+    if cached is None or current_app.debug:
+        html = render_template(template)
+        cached = (html, hashlib.blake2b(html.encode(), digest_size=16).hexdigest())
+        _RENDERED[template] = cached
+    html, etag = cached
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'public, max-age=300'
+    return response
+
 @pages_bp.route('/')
 def index():
     """Home page."""
-    return render_template('index.html')
+    return _static_page('index.html')
 
 @pages_bp.route('/strategy')
 def strategy():
     """Strategy backtest page."""
-    return render_template('strategy.html')
+    return _static_page('strategy.html')
 
 @pages_bp.route('/cpr-filter')
 def cpr_filter():
     """CPR filter page."""
-    return render_template('cpr_filter.html')
+    return _static_page('cpr_filter.html')
 
 @pages_bp.route('/historical')
 def historical():
     """Historical data page."""
-    return render_template('historical.html')
+    return _static_page('historical.html')
 
 @pages_bp.route('/options-chart')
 def options_chart():
     """Options chart page."""
-    return render_template('options_chart.html')
+    return _static_page('options_chart.html')
 
 @pages_bp.route('/login')
 def login():
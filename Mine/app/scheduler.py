@@ -1,90 +1,124 @@
 """
 Background scheduler for recurring tasks during market hours.
 Handles market hours checking and scheduled API calls.
+
+The in-process scheduler runs in every process whose config has
+ENABLE_SCHEDULER set (see app/config.py): on by default for the development
+server (`python run.py`), opt-in elsewhere, so enable it on exactly one
+process (e.g. one gunicorn worker) to avoid duplicate jobs.
+Deployments with an OS scheduler can drive the one-shot CLI instead,
+which authenticates from API_KEY/ACCESS_TOKEN rather than a user session,
+e.g. a systemd timer with:
+
+    [Timer]
+    OnCalendar=Mon..Fri *-*-* 09..15:00/5:00
+
+    [Service]
+    Type=oneshot
+    WorkingDirectory=/path/to/Mine
+    ExecStart=/path/to/venv/bin/python cpr_filter_service.py
 """
+import atexit
+import threading
 from datetime import datetime, time
-from typing import Optional, Any
+from functools import lru_cache
+from time import monotonic
+from typing import Optional
 from app.utils.logger import logger
 
-# Optional: APScheduler for background scheduling
-try:
-    from apscheduler.schedulers.background import BackgroundScheduler
-    from apscheduler.triggers.cron import CronTrigger
-    APSCHEDULER_AVAILABLE = True
-except ImportError:
-    APSCHEDULER_AVAILABLE = False
-    # Define as None for type checking when not available
-    BackgroundScheduler = None  # type: ignore
-    CronTrigger = None  # type: ignore
-    logger.warning("APScheduler not installed. Background scheduler disabled. Install with: pip install apscheduler==3.10.4")
+
+# The clock checks only change a few times a day; memoize them per time bucket
+@lru_cache(maxsize=1)
+def _within(_bucket: int, start: time, end: time) -> bool:
+    return start <= datetime.now().time() <= end
+
+
+@lru_cache(maxsize=1)
+def _weekday(_bucket: int) -> int:
+    return datetime.now().weekday()
+
+
+def _seconds_until_next_boundary(interval: int) -> float:
+    """Seconds until the wall clock next hits a multiple of ``interval`` past the hour."""
+    now = datetime.now()
+    elapsed = now.minute * 60 + now.second + now.microsecond / 1_000_000
+    return interval - (elapsed % interval)
 
 
 class MarketScheduler:
-    """Manages background scheduled tasks during market hours."""
+    """Manages background scheduled tasks during market hours.
+    
+    A single daemon threading.Timer is re-armed after every tick, aligned to
+    5-minute wall-clock boundaries (:00, :05, ...).
+    """
+    
+    __slots__ = ('_timer', '_expected_at', '_lock', 'running')
     
     # Market hours: 9:15 AM to 3:40 PM IST (Monday to Friday)
     MARKET_OPEN = time(9, 15)
     MARKET_CLOSE = time(15, 40)
     
+    INTERVAL_SECONDS = 300
+    MISFIRE_GRACE_SECONDS = 60  # Skip a tick that fires more than 60s late
+    
     def __init__(self):
         """Initialize the scheduler."""
-        self.scheduler: Optional[Any] = None
-        self.cpr_filter_job: Optional[Any] = None
-        
-        if not APSCHEDULER_AVAILABLE:
-            return
-        
-        self.scheduler = BackgroundScheduler(daemon=True)  # type: ignore
+        self._timer: Optional[threading.Timer] = None
+        self._expected_at = 0.0  # monotonic time the armed tick is due
+        self._lock = threading.Lock()
+        self.running = False
     
     def is_market_hours(self) -> bool:
-        """Check if current time is within market hours."""
-        now = datetime.now().time()
+        """Check if current time is within market hours (re-evaluated every 30s)."""
         # Market is open from 9:15 AM to 3:40 PM
-        return self.MARKET_OPEN <= now <= self.MARKET_CLOSE
+        return _within(int(monotonic()) // 30, self.MARKET_OPEN, self.MARKET_CLOSE)
     
     def is_trading_day(self) -> bool:
-        """Check if today is a trading day (Monday-Friday)."""
-        today = datetime.now().weekday()
-        return today < 5  # 0-4 are Monday-Friday
+        """Check if today is a trading day (Monday-Friday, re-evaluated hourly)."""
+        return _weekday(int(monotonic()) // 3600) < 5  # 0-4 are Monday-Friday
     
     def start(self):
         """Start the background scheduler."""
-        if not APSCHEDULER_AVAILABLE:
-            logger.warning("APScheduler not available - backend scheduler disabled")
-            logger.info("Use frontend scheduler (JavaScript) for recurring CPR filter calls")
-            return
-        
-        if not self.scheduler or self.scheduler.running:
-            logger.info("Scheduler is already running")
-            return
-        
-        # Schedule CPR filter to run every 5 minutes during market hours
-        # Cron expression: Every 5 minutes on weekdays between 9:15 AM and 3:40 PM IST
-        self.cpr_filter_job = self.scheduler.add_job(
-            self._run_cpr_filter_task,
-            CronTrigger(  # type: ignore
-                day_of_week='mon-fri',  # Monday to Friday
-                hour='9-15',             # 9 AM to 3 PM
-                minute='*/5',            # Every 5 minutes
-                second='0'
-            ),
-            id='cpr_filter_recurring',
-            name='CPR Filter Recurring Task',
-            replace_existing=True,
-            misfire_grace_time=60  # Allow 60s grace period if task is late
-        )
-        
-        self.scheduler.start()
+        with self._lock:
+            if self.running:
+                logger.info("Scheduler is already running")
+                return
+            self.running = True
+            self._schedule_next()
         logger.info("Market scheduler started")
         logger.info("CPR filter job scheduled: Every 5 minutes during market hours")
     
     def stop(self):
         """Stop the background scheduler."""
-        if not self.scheduler or not self.scheduler.running:
-            return
-        self.scheduler.shutdown()
+        with self._lock:
+            if not self.running:
+                return
+            self.running = False
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
         logger.info("Market scheduler stopped")
     
+    def _schedule_next(self):
+        """Arm the timer for the next boundary; caller must hold the lock."""
+        delay = _seconds_until_next_boundary(self.INTERVAL_SECONDS)
+        self._expected_at = monotonic() + delay
+        self._timer = threading.Timer(delay, self._tick)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _tick(self):
+        """Timer callback: re-arm first, then run the task unless it misfired."""
+        with self._lock:
+            if not self.running:
+                return
+            lateness = monotonic() - self._expected_at
+            self._schedule_next()
+        if lateness > self.MISFIRE_GRACE_SECONDS:
+            logger.warning("CPR filter tick ran %.0fs late, skipping", lateness)
+            return
+        self._run_cpr_filter_task()
+    
     def _run_cpr_filter_task(self):
         """Execute CPR filter task (called by scheduler)."""
         try:
@@ -101,36 +135,32 @@ class MarketScheduler:
             # Background scheduler tasks run without Flask request context
             # This is a limitation - background tasks cannot access user sessions
             logger.warning("Background scheduler: CPR filter task requires active user session")
-            logger.info("Note: Implement persistent authentication (API key) for background tasks")
+            logger.info("Note: run `python cpr_filter_service.py` from an OS timer for session-less runs")
             
         except Exception as e:
-            logger.error(f"Unexpected error in CPR filter background task: {e}", exc_info=True)
+            logger.error("Unexpected error in CPR filter background task: %s", e, exc_info=True)
 
 
 # Global scheduler instance
 market_scheduler = MarketScheduler()
+_started = threading.Event()
+_start_lock = threading.Lock()
 
 
 def init_scheduler(app):
-    """Initialize scheduler with Flask app."""
-    if not APSCHEDULER_AVAILABLE:
-        logger.info("APScheduler not installed - backend scheduler disabled")
-        return market_scheduler
+    """Initialize scheduler with Flask app and start it (once per process).
     
-    logger.info("Initializing market scheduler...")
+    Called by init_extensions() only when app.config['ENABLE_SCHEDULER'] is set.
+    """
+    with _start_lock:
+        if _started.is_set():
+            return market_scheduler
+        _started.set()
     
-    # Flask 3.0+ doesn't have before_first_request, use app.config instead
-    with app.app_context():
-        @app.before_request
-        def start_scheduler_once():
-            """Start scheduler on first request (using flag)."""
-            if not getattr(app, '_scheduler_started', False):
-                app._scheduler_started = True
-                if market_scheduler.scheduler and not market_scheduler.scheduler.running:
-                    market_scheduler.start()
+    logger.info("Initializing market scheduler...")
+    market_scheduler.start()
     
     # Register shutdown handler
-    import atexit
     atexit.register(market_scheduler.stop)
     
     return market_scheduler
@@ -1,6 +1,7 @@
 """Utils package."""
 from .logger import logger, setup_logger
-from .cache import CacheManager, options_chart_cache, cpr_filter_cache
+from .cache import CacheManager, RedisCacheManager, options_chart_cache, cpr_filter_cache, options_strikes_cache, token_store
+from .nfo_cache import get_nfo
 from .helpers import (
     is_market_hours, extract_symbol_from_tradingsymbol, calculate_cpr,
     INDICES, INDEX_TOKENS
@@ -8,7 +9,9 @@ from .helpers import (
 
 __all__ = [
     'logger', 'setup_logger',
-    'CacheManager', 'options_chart_cache', 'cpr_filter_cache',
+    'CacheManager', 'RedisCacheManager', 'options_chart_cache', 'cpr_filter_cache', 'options_strikes_cache',
+    'token_store',
+    'get_nfo',
     'is_market_hours', 'extract_symbol_from_tradingsymbol', 'calculate_cpr',
     'INDICES', 'INDEX_TOKENS'
 ]
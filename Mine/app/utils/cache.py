@@ -1,54 +1,259 @@
 """
 Cache utilities and management.
 Thread-safe caching for API responses.
+
+Set REDIS_URL to share the global caches across worker processes;
+otherwise each process keeps its own in-memory copy.
 """
+import heapq
+import os
 import threading
 import time
-from typing import Dict, Tuple, Any, Optional
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Tuple, Any, Optional
+
+import orjson
+
+from .logger import logger
+
+# Independent lock/dict/heap shards; keys map to one by hash
+_SHARD_COUNT = 16
+_SHARD_MASK = _SHARD_COUNT - 1
+
+class _Shard:
+    """One slice of a CacheManager: entries, their expiry heap and a lock."""
+    
+    __slots__ = ('cache', 'lock', 'expiry_heap', 'writes')
+    
+    def __init__(self):
+        self.cache: Dict[str, Tuple[Any, float]] = {}
+        self.lock = threading.Lock()
+        # (expires_at, key) min-heap; stale entries for re-set keys are skipped
+        self.expiry_heap: List[Tuple[float, str]] = []
+        self.writes = 0
 
 class CacheManager:
-    """Thread-safe cache manager for API responses."""
+    """Thread-safe cache manager for API responses.
+    
+    Entries are spread over 16 shards, each with its own lock, so lookups
+    for different keys rarely contend. Ages use time.monotonic().
+    """
+    
+    __slots__ = ('_shards', '_ttl', '_inflight', '_inflight_lock')
     
     def __init__(self, ttl: int = 60):
         """Initialize cache with TTL (time to live) in seconds."""
-        self._cache: Dict[str, Tuple[Any, float]] = {}
-        self._lock = threading.Lock()
+        self._shards = tuple(_Shard() for _ in range(_SHARD_COUNT))
         self._ttl = ttl
+        # Single-flight: one loader per missing key, other callers wait on it
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+    
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) & _SHARD_MASK]
     
     def get(self, key: str) -> Optional[Any]:
         """Get value from cache if not expired."""
-        with self._lock:
-            if key not in self._cache:
+        shard = self._shard(key)
+        with shard.lock:
+            entry = shard.cache.get(key)
+            if entry is None:
                 return None
             
-            value, timestamp = self._cache[key]
-            if time.time() - timestamp > self._ttl:
-                del self._cache[key]
+            value, timestamp = entry
+            if time.monotonic() - timestamp > self._ttl:
+                del shard.cache[key]
                 return None
             
             return value
     
     def set(self, key: str, value: Any) -> None:
         """Set value in cache with current timestamp."""
-        with self._lock:
-            self._cache[key] = (value, time.time())
+        shard = self._shard(key)
+        with shard.lock:
+            now = time.monotonic()
+            shard.cache[key] = (value, now)
+            heapq.heappush(shard.expiry_heap, (now + self._ttl, key))
+            shard.writes += 1
+            # Sweep opportunistically so no external cleanup job is needed
+            if shard.writes % 128 == 0:
+                self._evict_expired(shard, now)
+    
+    def get_or_compute(self, key: str, loader: Callable[[], Any],
+                       should_cache: Optional[Callable[[Any], bool]] = None) -> Any:
+        """Get value from cache, or compute it once even under concurrent misses.
+        
+        Concurrent callers for the same missing key wait for the first
+        caller's loader instead of hitting the upstream API themselves.
+        ``should_cache`` can veto storing a result (e.g. empty payloads).
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                # Another caller may have finished between get() and here
+                value = self.get(key)
+                if value is not None:
+                    return value
+                future = Future()
+                self._inflight[key] = future
+        
+        if not owner:
+            return future.result()
+        
+        try:
+            value = loader()
+            if value is not None and (should_cache is None or should_cache(value)):
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
     
     def clear(self) -> None:
         """Clear all cache."""
-        with self._lock:
-            self._cache.clear()
+        for shard in self._shards:
+            with shard.lock:
+                shard.cache.clear()
+                shard.expiry_heap.clear()
     
     def cleanup_expired(self) -> None:
         """Remove expired entries from cache."""
-        with self._lock:
-            current_time = time.time()
-            expired_keys = [
-                key for key, (_, timestamp) in self._cache.items()
-                if current_time - timestamp > self._ttl
-            ]
-            for key in expired_keys:
-                del self._cache[key]
+        for shard in self._shards:
+            with shard.lock:
+                self._evict_expired(shard, time.monotonic())
+    
+    def _evict_expired(self, shard: _Shard, now: float) -> None:
+        """Pop due heap entries; caller must hold the shard lock."""
+        heap = shard.expiry_heap
+        while heap and heap[0][0] < now:
+            _, key = heapq.heappop(heap)
+            entry = shard.cache.get(key)
+            if entry is not None and now - entry[1] > self._ttl:
+                del shard.cache[key]
+
+# Redis payload tags: raw bytes bodies vs orjson-encoded values
+_RAW_TAG = b'b'
+_JSON_TAG = b'j'
+
+
+def _encode(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return _RAW_TAG + value
+    return _JSON_TAG + orjson.dumps(value)
+
+
+def _decode(raw: bytes) -> Any:
+    tag, payload = raw[:1], raw[1:]
+    if tag == _RAW_TAG:
+        return payload
+    if tag == _JSON_TAG:
+        return orjson.loads(payload)
+    raise ValueError(f"unknown payload tag {tag!r}")
+
+class RedisCacheManager(CacheManager):
+    """Redis-backed cache shared by all workers, fronted by a 1s in-process L1.
+
+    Expiry is handled by Redis (SET ... EX ttl). Values are stored as
+    orjson (bytes bodies verbatim, behind a one-byte tag), never pickled,
+    so writing to Redis can't execute code here. Values must be
+    JSON-shaped; dates come back as ISO strings. Redis errors are logged
+    and treated as cache misses.
+    """
+    
+    __slots__ = ('_redis', '_prefix', '_local')
+    
+    def __init__(self, ttl: int = 60, client=None, prefix: str = ''):
+        super().__init__(ttl=ttl)
+        self._redis = client
+        self._prefix = prefix
+        # L1 absorbs bursts of identical lookups within one worker
+        self._local = CacheManager(ttl=min(ttl, 1))
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Get value from the local L1, then Redis."""
+        value = self._local.get(key)
+        if value is not None:
+            return value
+        try:
+            raw = self._redis.get(self._prefix + key)
+        except Exception as e:
+            logger.warning("Redis get failed for %s: %s", key, e)
+            return None
+        if raw is None:
+            return None
+        try:
+            value = _decode(raw)
+        except (orjson.JSONDecodeError, ValueError) as e:
+            logger.warning("Undecodable Redis value for %s: %s", key, e)
+            return None
+        self._local.set(key, value)
+        return value
+    
+    def set(self, key: str, value: Any) -> None:
+        """Set value in Redis with the cache TTL."""
+        self._local.set(key, value)
+        try:
+            self._redis.set(self._prefix + key, _encode(value), ex=self._ttl)
+        except Exception as e:
+            logger.warning("Redis set failed for %s: %s", key, e)
+    
+    def clear(self) -> None:
+        """Clear this cache's keys."""
+        self._local.clear()
+        try:
+            keys = list(self._redis.scan_iter(match=self._prefix + '*'))
+            if keys:
+                self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning("Redis clear failed: %s", e)
+    
+    def cleanup_expired(self) -> None:
+        """Redis expires keys itself; only the L1 needs sweeping."""
+        self._local.cleanup_expired()
+
+
+_redis_client = None
+_redis_lock = threading.Lock()
+
+
+def get_redis():
+    """Shared Redis client for REDIS_URL, or None when unset/unavailable."""
+    global _redis_client
+    url = os.environ.get('REDIS_URL')
+    if not url:
+        return None
+    with _redis_lock:
+        if _redis_client is None:
+            try:
+                import redis
+            except ImportError:
+                logger.warning("REDIS_URL is set but redis is not installed; using in-memory cache")
+                return None
+            _redis_client = redis.Redis(
+                connection_pool=redis.BlockingConnectionPool.from_url(url, max_connections=32)
+            )
+    return _redis_client
+
+
+def _make_cache(name: str, ttl: int) -> CacheManager:
+    """Build a Redis-backed cache when REDIS_URL is set, else an in-memory one."""
+    client = get_redis()
+    if client is None:
+        return CacheManager(ttl=ttl)
+    return RedisCacheManager(ttl=ttl, client=client, prefix=f'mine:{name}:')
 
 # Global cache instances
-options_chart_cache = CacheManager(ttl=60)
-cpr_filter_cache = CacheManager(ttl=300)
+options_chart_cache = _make_cache('options_chart', ttl=60)
+cpr_filter_cache = _make_cache('cpr_filter', ttl=300)
+options_strikes_cache = _make_cache('options_strikes', ttl=300)
+# Kite access tokens keyed by API key; shared across workers with Redis
+token_store = _make_cache('access_token', ttl=8 * 3600)
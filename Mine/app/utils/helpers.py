@@ -2,7 +2,9 @@
 Utility constants and helpers.
 """
 import re
-from datetime import datetime
+import time
+from datetime import datetime, time as dt_time
+from functools import lru_cache
 from typing import Tuple
 
 # Market Hours (IST)
@@ -29,19 +31,25 @@ NIFTY_FINNIFTY_ROUNDING = 50
 BANKNIFTY_STRIKE_OFFSET = 100
 NIFTY_FINNIFTY_STRIKE_STEP = 150
 
-def is_market_hours() -> bool:
-    """Check if current time is within market hours."""
+# Leading uppercase run of a trading symbol, e.g. 'NIFTY' in 'NIFTY24DEC24000CE'
+_SYMBOL_PREFIX_MATCH = re.compile(r'^([A-Z]+)').match
+
+_MARKET_OPEN_TIME = dt_time(MARKET_OPEN_HOUR, MARKET_OPEN_MINUTE)
+_MARKET_CLOSE_TIME = dt_time(MARKET_CLOSE_HOUR, MARKET_CLOSE_MINUTE)
+
+@lru_cache(maxsize=1)
+def _market_hours_in_bucket(_bucket: int) -> bool:
     now = datetime.now().time()
-    market_open = datetime.min.time().replace(hour=MARKET_OPEN_HOUR, minute=MARKET_OPEN_MINUTE)
-    market_close = datetime.min.time().replace(hour=MARKET_CLOSE_HOUR, minute=MARKET_CLOSE_MINUTE)
-    return market_open <= now < market_close
+    return _MARKET_OPEN_TIME <= now < _MARKET_CLOSE_TIME
+
+def is_market_hours() -> bool:
+    """Check if current time is within market hours (re-evaluated every 30s)."""
+    return _market_hours_in_bucket(int(time.monotonic()) // 30)
 
 def extract_symbol_from_tradingsymbol(trading_symbol: str) -> str:
     """Extract base symbol from trading symbol."""
-    match = re.match(r'^([A-Z]+)', trading_symbol)
-    if match:
-        return match.group(1)
-    return trading_symbol
+    match = _SYMBOL_PREFIX_MATCH(trading_symbol)
+    return match.group(1) if match else trading_symbol
 
 def calculate_cpr(high: float, low: float, close: float) -> Tuple[float, float, float]:
     """Calculate Central Pivot Range (PP, BC, TC)."""
@@ -1,18 +1,37 @@
 """
 Logging and utility functions.
+
+Log records are enqueued on the calling thread and written to stderr by a
+single background listener, so request threads never block on stream I/O.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
 from app.config import current_config
 
+_log_queue = queue.SimpleQueue()
+_listener = None
+
+def _start_listener():
+    """Start the background writer thread that drains the log queue (once)."""
+    global _listener
+    if _listener is not None:
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter(current_config.LOG_FORMAT))
+    _listener = logging.handlers.QueueListener(_log_queue, handler)
+    _listener.start()
+    # Flush pending records on shutdown
+    atexit.register(_listener.stop)
+
 def setup_logger(name):
     """Create and configure a logger."""
     logger = logging.getLogger(name)
     
     if not logger.handlers:
-        handler = logging.StreamHandler()
-        formatter = logging.Formatter(current_config.LOG_FORMAT)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        _start_listener()
+        logger.addHandler(logging.handlers.QueueHandler(_log_queue))
         logger.setLevel(current_config.LOG_LEVEL)
     
     return logger
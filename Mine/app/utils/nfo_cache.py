@@ -0,0 +1,79 @@
+"""
+Daily instrument caches.
+Keeps one pickled copy per trading day of each Kite instrument dump (and
+lookups derived from one) on disk, so restarts don't pay the multi-second
+instruments download again.
+"""
+import glob
+import os
+import pickle
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+
+from .logger import logger
+
+CACHE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', '.cache')
+
+_memo: Dict[str, Tuple[str, Any]] = {}
+# One lock per name: concurrent loads of one dump are single-flight
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _cache_path(name: str, day: str) -> str:
+    return os.path.join(CACHE_DIR, f'{name}_{day}.pkl')
+
+
+def load_daily(name: str, build: Callable[[], Any]) -> Any:
+    """Return today's ``name`` from memory, then .cache/, else build() and persist it.
+
+    Empty results (e.g. from an expired token) are returned but not cached.
+    """
+    day = date.today().strftime('%Y%m%d')
+    memo = _memo.get(name)
+    if memo and memo[0] == day:
+        return memo[1]
+
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.Lock())
+    with lock:
+        memo = _memo.get(name)
+        if memo and memo[0] == day:
+            return memo[1]
+
+        path = _cache_path(name, day)
+        value = None
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            logger.info("✓ Loaded %s from %s", name, path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("Error loading %s pickle cache: %s", name, e)
+
+        if value is None:
+            value = build()
+            if not value:
+                return value
+            try:
+                os.makedirs(CACHE_DIR, exist_ok=True)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(value, f, protocol=5)
+                os.replace(tmp_path, path)
+                # Drop earlier days' dumps
+                for old in glob.glob(_cache_path(name, '*')):
+                    if old != path:
+                        os.remove(old)
+            except OSError as e:
+                logger.warning("Error saving %s pickle cache: %s", name, e)
+
+        _memo[name] = (day, value)
+        return value
+
+
+def get_nfo(kite) -> List[Dict[str, Any]]:
+    """Get today's NFO instruments from memory, then disk, then the Kite API."""
+    return load_daily('nfo', lambda: kite.instruments('NFO'))
@@ -1,25 +1,142 @@
+import numpy as np
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, time as dt_time, timedelta
 from kiteconnect import KiteConnect
+from kiteconnect.exceptions import NetworkException
 from dataclasses import dataclass
+import glob
 import os
+import random
+import re
 from dotenv import load_dotenv
 import logging
-from typing import Optional, List, Dict, Tuple, cast, Union
+from typing import NamedTuple, Optional, List, Dict, Tuple, cast, Union
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 import threading
+from collections import OrderedDict
+from operator import itemgetter
+from app.utils.nfo_cache import get_nfo, load_daily
 from service.cpr_service import CPRService
+from service.rate_limiter import kite_rate_limit
 
 load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
 # Global persistent cache (survives between filter requests)
-_global_cache = {}
+# LRU order: hits move to the end, eviction pops from the front. Values are (expires_at, frame)
+_global_cache: 'OrderedDict[str, Tuple[float, pd.DataFrame]]' = OrderedDict()
 _global_cache_lock = threading.Lock()
+# Fetches in progress, so concurrent misses for one key share a single Kite call
+_inflight: Dict[str, Future] = {}
+
+# On-disk copy of the historical cache (survives restarts)
+_HIST_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'hist')
+_HIST_CACHE_MAX_AGE = 7 * 86400  # Prune files older than a week
+_HIST_CACHE_MAX_ENTRIES = 1024  # ~5 sessions of the F&O universe in memory
+_HIST_CACHE_TTL = 24 * 3600  # In-memory frames expire a day after they were stored
+_HIST_PROVISIONAL_TTL = 5 * 60  # Frames missing the session's bar (holiday, provider lag)
+_disk_pruned = False
+# Process-wide instrument preload threads, started by the first CPRFilterService
+_preload_threads: Dict[str, threading.Thread] = {}
+_preload_lock = threading.Lock()
+
+
+_MARKET_OPEN = dt_time(9, 15)
+
+
+def _market_session_date(now: datetime) -> date:
+    """Date of the latest session that has opened; pre-open and weekends roll back."""
+    day = now.date()
+    if now.time() < _MARKET_OPEN:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day
+
+
+def _candles_to_frame(data: List[Dict]) -> pd.DataFrame:
+    """Build a float64 OHLCV frame indexed by date straight from Kite candles."""
+    count = len(data)
+    columns = {
+        col: np.fromiter((row[col] for row in data), dtype=np.float64, count=count)
+        for col in data[0] if col != 'date'
+    }
+    return pd.DataFrame(columns, index=pd.DatetimeIndex([row['date'] for row in data], name='date'))
+
+
+def _read_disk_frame(key: str) -> Optional[pd.DataFrame]:
+    try:
+        return pd.read_pickle(os.path.join(_HIST_CACHE_DIR, f"{key}.pkl"))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Disk cache read failed for %s: %s", key, e)
+        return None
 
-@dataclass
+
+def _write_disk_frame(key: str, df: pd.DataFrame) -> None:
+    try:
+        os.makedirs(_HIST_CACHE_DIR, exist_ok=True)
+        path = os.path.join(_HIST_CACHE_DIR, f"{key}.pkl")
+        df.to_pickle(path + '.tmp')
+        os.replace(path + '.tmp', path)
+    except Exception as e:
+        logger.warning("Disk cache write failed for %s: %s", key, e)
+
+
+def _cache_put(key: str, df: pd.DataFrame, ttl: float = _HIST_CACHE_TTL) -> None:
+    """Insert into the global cache, evicting expired and least-recently-used entries (hold the lock)."""
+    now = time.monotonic()
+    _global_cache[key] = (now + ttl, df)
+    _global_cache.move_to_end(key)
+    # popitem() rather than an iterator: lock-free readers may move_to_end concurrently
+    while len(_global_cache) > 1:
+        lru_key, entry = _global_cache.popitem(last=False)
+        if len(_global_cache) < _HIST_CACHE_MAX_ENTRIES and now <= entry[0]:
+            _global_cache[lru_key] = entry
+            _global_cache.move_to_end(lru_key, last=False)
+            break
+
+
+def _cache_get(key: str) -> Optional[pd.DataFrame]:
+    """Return a live cached frame and mark it recently used; safe without the lock."""
+    entry = _global_cache.get(key)
+    if entry is None or time.monotonic() > entry[0]:
+        return None
+    try:
+        _global_cache.move_to_end(key)
+    except KeyError:
+        pass  # Evicted by a concurrent writer after the get
+    return entry[1]
+
+
+def prune_disk_cache() -> int:
+    """Delete on-disk frames older than _HIST_CACHE_MAX_AGE (once per process).
+
+    Frames are read back lazily by _cached_frame(); keys carry the session
+    date, so nothing is preloaded.
+    """
+    global _disk_pruned
+    if _disk_pruned:
+        return 0
+    _disk_pruned = True
+
+    cutoff = time.time() - _HIST_CACHE_MAX_AGE
+    removed = 0
+    for path in glob.glob(os.path.join(_HIST_CACHE_DIR, '*.pkl')):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            pass
+    if removed:
+        logger.info("Pruned %d stale historical frames from disk cache", removed)
+    return removed
+
+@dataclass(slots=True, frozen=True)
 class CPRLevels:
     daily_pp: float
     daily_bc: float
@@ -35,6 +152,12 @@ class CPRLevels:
     current_low: float
     previous_close: float
 
+class RunDates(NamedTuple):
+    """Dates fixed once per filter run so every worker builds the same cache keys."""
+    as_of: datetime
+    prev_week: Tuple[datetime, datetime]
+    prev_month: Tuple[datetime, datetime]
+
 # Type aliases for clearer payload structure
 SignalPayload = Dict[str, Union[float, str]]
 WeeklyCrossPayload = Dict[str, List[SignalPayload]]
@@ -43,8 +166,11 @@ FilterResult = Dict[str, Union[List[SignalPayload], WeeklyCrossPayload]]
 class CPRFilterService:
     PERCENTAGE_DIFF_THRESHOLD = 3.0
     INDEX_SYMBOLS = ['NIFTY', 'BANKNIFTY', 'FINNIFTY']
-    API_RATE_LIMIT_DELAY = 0.05  # Reduced from 0.1 - works better with thread pool
+    _INDEX_RE = re.compile('|'.join(INDEX_SYMBOLS))
     MAX_WORKERS = 4  # Reduced from 8 to avoid API throttling
+    HIST_LOOKBACK_DAYS = 70  # Daily candles back to the start of the previous month
+    QUOTE_BATCH_SIZE = 500  # Kite quote() accepts up to 500 instruments per call
+    HIST_MAX_RETRIES = 4  # Retries of a throttled (HTTP 429) historical call
 
     CROSS_ABOVE_WEEKLY = "↗ CROSSED ABOVE WEEKLY CPR"
     CROSS_BELOW_WEEKLY = "↘ CROSSED BELOW WEEKLY CPR"
@@ -56,165 +182,232 @@ class CPRFilterService:
             if token:
                 self.kite.set_access_token(token)
         
-        self._instruments = []
+        self._token_map: Dict[str, int] = {}
         self._fo_stocks = None
         # Use global cache for persistence between requests
         self._historical_data_cache = _global_cache
         self._cache_lock = _global_cache_lock
-        self._last_api_call = 0.0
-        self._api_lock = threading.Lock()
-        self._load_instruments()
+        # Download the NSE and NFO dumps side by side, once per process; first use joins them
+        with _preload_lock:
+            if not _preload_threads:
+                for name, target in (('instruments', self._load_instruments), ('fo_stocks', self._load_fo_stocks)):
+                    thread = _preload_threads[name] = threading.Thread(target=target, name=f"cpr-{name}", daemon=True)
+                    thread.start()
 
-    def _rate_limit(self):
-        with self._api_lock:
-            elapsed = time.time() - self._last_api_call
-            if elapsed < self.API_RATE_LIMIT_DELAY:
-                time.sleep(self.API_RATE_LIMIT_DELAY - elapsed)
-            self._last_api_call = time.time()
+    def _rate_limit(self, kind: str = 'default'):
+        kite_rate_limit(kind)
 
     def _load_instruments(self):
-        if not self._instruments:
+        if self._token_map:
+            return
+
+        def build() -> Dict[str, int]:
             self._rate_limit()
-            try:
-                self._instruments = self.kite.instruments('NSE')
-                logger.info(f"Loaded {len(self._instruments)} instruments")
-            except Exception as e:
-                logger.error(f"Instruments load failed: {e}")
-                self._instruments = []
+            instruments = self.kite.instruments('NSE')
+            logger.info("Loaded %d instruments", len(instruments))
+            return {
+                inst['tradingsymbol']: inst['instrument_token'] for inst in instruments
+                if inst.get('instrument_type') == 'EQ'
+            }
+
+        try:
+            self._token_map = load_daily('nse_eq_tokens', build)
+        except Exception as e:
+            logger.error("Instruments load failed: %s", e)
 
     def get_token(self, symbol: str) -> Optional[int]:
-        if not self._instruments:
+        _preload_threads['instruments'].join()
+        if not self._token_map:
             self._load_instruments()
-        for inst in self._instruments:
-            if inst.get('tradingsymbol') == symbol and inst.get('instrument_type') == 'EQ':
-                return inst.get('instrument_token')
-        return None
+        return self._token_map.get(symbol)
+
+    def _cached_frame(self, key: str, fetch, provisional=None) -> Optional[pd.DataFrame]:
+        """Look up a frame in memory, then on disk, then via fetch().
+
+        A fetched frame for which ``provisional`` returns True is kept in
+        memory for _HIST_PROVISIONAL_TTL only and never written to disk.
+        """
+        # OrderedDict get/move_to_end are atomic under the GIL; only inserts take the lock
+        df = _cache_get(key)
+        if df is not None:
+            return df
 
-    def get_hist_data(self, symbol: str, days: int, interval='day') -> Optional[pd.DataFrame]:
-        key = f"{symbol}_{days}_{interval}"
         with self._cache_lock:
-            if key in self._historical_data_cache: 
-                return self._historical_data_cache[key]
+            df = _cache_get(key)
+            if df is not None:
+                return df
+            future = _inflight.get(key)
+            owner = future is None
+            if owner:
+                future = _inflight[key] = Future()
 
-        token = self.get_token(symbol)
-        if not token:
-            return None
+        if not owner:
+            return future.result()
 
-        self._rate_limit()
         try:
-            start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            end = datetime.now().strftime('%Y-%m-%d')
-            data = self.kite.historical_data(token, start, end, interval)
-            if not data:
-                return None
-            
-            df = pd.DataFrame(data).set_index('date').astype(float)
-            df.index = pd.to_datetime(df.index)
-            
-            with self._cache_lock:
-                self._historical_data_cache[key] = df
-            
+            df = _read_disk_frame(key)
+            ttl = _HIST_CACHE_TTL
+            if df is None:
+                df = fetch()
+                if df is not None and provisional is not None and provisional(df):
+                    ttl = _HIST_PROVISIONAL_TTL
+                elif df is not None:
+                    _write_disk_frame(key, df)
+            if df is not None:
+                with self._cache_lock:
+                    _cache_put(key, df, ttl)
+            future.set_result(df)
             return df
-        except Exception as e:
-            logger.error(f"Hist data failed for {symbol}: {e}")
-            return None
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._cache_lock:
+                _inflight.pop(key, None)
+
+    def _historical_data(self, token: int, start: str, end: str, interval: str) -> List[Dict]:
+        """kite.historical_data() with a bounded, jittered back-off on HTTP 429."""
+        for attempt in range(self.HIST_MAX_RETRIES + 1):
+            self._rate_limit('historical')
+            try:
+                return self.kite.historical_data(token, start, end, interval)
+            except NetworkException as e:
+                if e.code != 429 or attempt == self.HIST_MAX_RETRIES:
+                    raise
+                # Back off with jitter so throttled workers don't retry in lockstep
+                sleep_s = min(8.0, 0.5 * (2 ** attempt) + random.uniform(0, 0.4))
+                logger.warning("Historical call throttled for token %s (attempt %d), backing off %.2fs", token, attempt + 1, sleep_s)
+                time.sleep(sleep_s)
+        return []
+
+    def get_hist_data(self, symbol: str, days: int, interval='day', as_of: Optional[datetime] = None) -> Optional[pd.DataFrame]:
+        # Keyed by market session, so weekends and pre-open reuse the last session's window
+        session = _market_session_date(as_of or datetime.now())
+        key = f"{symbol}_{days}_{interval}_{session:%Y-%m-%d}"
+
+        def fetch() -> Optional[pd.DataFrame]:
+            token = self.get_token(symbol)
+            if not token:
+                return None
 
+            try:
+                start = (session - timedelta(days=days)).strftime('%Y-%m-%d')
+                end = session.strftime('%Y-%m-%d')
+                data = self._historical_data(token, start, end, interval)
+                if not data:
+                    return None
+                
+                df = _candles_to_frame(data)
+                return df
+            except Exception as e:
+                logger.error("Hist data failed for %s: %s", symbol, e)
+                return None
 
+        # Without the session's bar (exchange holiday, provider lag) the frame
+        # is only held briefly, so a late bar is picked up within minutes
+        return self._cached_frame(key, fetch, provisional=lambda df: df.index[-1].date() != session)
 
-    def get_prev_week_range(self) -> Tuple[datetime, datetime]:
-        today = datetime.now()
+    def get_prev_week_range(self, today: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        today = today or datetime.now()
         days_to_fri = 3 if today.weekday() == 0 else today.weekday() + 2
         fri = today - timedelta(days=days_to_fri)
         mon = fri - timedelta(days=4)
         return mon, fri
 
-    def get_prev_month_range(self) -> Tuple[datetime, datetime]:
-        today = datetime.now()
+    def get_prev_month_range(self, today: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+        today = today or datetime.now()
         first_current = today.replace(day=1)
         last_prev = first_current - timedelta(days=1)
         first_prev = last_prev.replace(day=1)
         return first_prev, last_prev
 
-    def get_hist_range(self, symbol: str, from_date: datetime, to_date: datetime, interval='day') -> Optional[pd.DataFrame]:
-        key = f"{symbol}_{from_date.date()}_{to_date.date()}_{interval}"
-        with self._cache_lock:
-            if key in self._historical_data_cache:
-                return self._historical_data_cache[key]
-
-        token = self.get_token(symbol)
-        if not token:
-            return None
+    def run_dates(self, now: Optional[datetime] = None) -> RunDates:
+        now = now or datetime.now()
+        return RunDates(now, self.get_prev_week_range(now), self.get_prev_month_range(now))
 
-        self._rate_limit()
-        try:
-            logger.debug(f"API call for {symbol} {from_date.date()} to {to_date.date()}")
-            data = self.kite.historical_data(token, from_date.strftime('%Y-%m-%d'), 
-                                           to_date.strftime('%Y-%m-%d'), interval)
-            if not data: 
-                logger.debug(f"No data returned for {symbol} {from_date.date()} to {to_date.date()}")
-                return None
-            df = pd.DataFrame(data).set_index('date').astype(float)
-            df.index = pd.to_datetime(df.index)
-            with self._cache_lock:
-                self._historical_data_cache[key] = df
-            logger.debug(f"Cached {len(df)} rows for {symbol} {from_date.date()} to {to_date.date()}")
-            return df
-        except Exception as e:
-            logger.error(f"Range data failed for {symbol} {from_date.date()}-{to_date.date()}: {e}")
-            return None
-
-    def calc_cpr_levels(self, symbol: str) -> Optional[CPRLevels]:
-        # Daily CPR (prev day)
-        logger.debug(f"Fetching daily data for {symbol}...")
-        daily_df = self.get_hist_data(symbol, 5)
+    def fetch_current_prices(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Fetch quotes for all symbols in batches; returns {symbol: quote}."""
+        quotes: Dict[str, Dict] = {}
+        keys = [f"NSE:{symbol}" for symbol in symbols]
+        for i in range(0, len(keys), self.QUOTE_BATCH_SIZE):
+            self._rate_limit('quote')
+            try:
+                batch = self.kite.quote(keys[i:i + self.QUOTE_BATCH_SIZE])
+            except Exception as e:
+                logger.error("Quote batch failed: %s", e)
+                continue
+            for key, quote in batch.items():
+                quotes[key.split(':', 1)[1]] = quote
+        return quotes
+
+    def calc_cpr_levels(self, symbol: str, quote: Optional[Dict] = None,
+                        dates: Optional[RunDates] = None) -> Optional[CPRLevels]:
+        dates = dates or self.run_dates()
+        # One daily-candle fetch covers the previous day, week and month
+        logger.debug("Fetching daily data for %s...", symbol)
+        daily_df = self.get_hist_data(symbol, self.HIST_LOOKBACK_DAYS, as_of=dates.as_of)
         if daily_df is None or len(daily_df) < 2: 
-            logger.debug(f"Insufficient daily data for {symbol}")
+            logger.debug("Insufficient daily data for %s", symbol)
             return None
-        h, l, c = float(daily_df.iloc[-2]['high']), float(daily_df.iloc[-2]['low']), float(daily_df.iloc[-2]['close'])
+        # Plain arrays from here on: pandas indexing dominates on ~50-row frames
+        bar_dates = daily_df.index.date
+        highs, lows, closes = (daily_df[col].to_numpy() for col in ('high', 'low', 'close'))
+        
+        # Daily CPR (prev day)
+        h, l, c = float(highs[-2]), float(lows[-2]), float(closes[-2])
         d_pp, d_bc, d_tc = CPRService.calculate_cpr(h, l, c)
         
         # Weekly CPR (prev week Mon-Fri)
-        logger.debug(f"Fetching weekly data for {symbol}...")
-        mon, fri = self.get_prev_week_range()
-        week_df = self.get_hist_range(symbol, mon, fri)
-        if week_df is None: 
-            logger.debug(f"No weekly data for {symbol} ({mon.date()} to {fri.date()})")
+        mon, fri = dates.prev_week
+        week = np.flatnonzero((bar_dates >= mon.date()) & (bar_dates <= fri.date()))
+        if not week.size: 
+            logger.debug("No weekly data for %s (%s to %s)", symbol, mon.date(), fri.date())
             return None
-        w_h, w_l, w_c = float(week_df['high'].max()), float(week_df['low'].min()), float(week_df['close'].iloc[-1])
+        w_h, w_l, w_c = float(highs[week].max()), float(lows[week].min()), float(closes[week[-1]])
         w_pp, w_bc, w_tc = CPRService.calculate_cpr(w_h, w_l, w_c)
         
         # Monthly CPR (prev month)
-        logger.debug(f"Fetching monthly data for {symbol}...")
-        mon_start, mon_end = self.get_prev_month_range()
-        month_df = self.get_hist_range(symbol, mon_start, mon_end)
-        if month_df is None: 
-            logger.debug(f"No monthly data for {symbol} ({mon_start.date()} to {mon_end.date()})")
+        mon_start, mon_end = dates.prev_month
+        month = np.flatnonzero((bar_dates >= mon_start.date()) & (bar_dates <= mon_end.date()))
+        if not month.size: 
+            logger.debug("No monthly data for %s (%s to %s)", symbol, mon_start.date(), mon_end.date())
             return None
-        m_h, m_l, m_c = float(month_df['high'].max()), float(month_df['low'].min()), float(month_df['close'].iloc[-1])
+        m_h, m_l, m_c = float(highs[month].max()), float(lows[month].min()), float(closes[month[-1]])
         m_pp, m_bc, m_tc = CPRService.calculate_cpr(m_h, m_l, m_c)
         
-        # Current candle
-        curr_price, curr_high, curr_low = [float(daily_df.iloc[-1][col]) for col in ['close', 'high', 'low']]
+        # Current candle (live quote when available, else the latest daily bar)
+        if quote and quote.get('ohlc'):
+            curr_price = float(quote['last_price'])
+            curr_high, curr_low = float(quote['ohlc']['high']), float(quote['ohlc']['low'])
+        else:
+            curr_price, curr_high, curr_low = float(closes[-1]), float(highs[-1]), float(lows[-1])
         
-        logger.debug(f"CPR levels calculated for {symbol}")
+        logger.debug("CPR levels calculated for %s", symbol)
         return CPRLevels(d_pp, d_bc, d_tc, w_pp, w_bc, w_tc, m_pp, m_bc, m_tc, 
                         curr_price, curr_high, curr_low, c)
 
-    def get_fo_stocks(self) -> List[str]:
+    def _load_fo_stocks(self):
         if self._fo_stocks is not None:
-            return self._fo_stocks
-        
-        self._rate_limit()
+            return
+
+        def build() -> List[str]:
+            # The NFO dump itself is shared (and cached per day) with the options routes
+            nfo = pd.DataFrame(get_nfo(self.kite), columns=['name', 'instrument_type'])
+            names = nfo['name']
+            mask = ((nfo['instrument_type'] == 'FUT') & names.notna() & (names != '')
+                    & ~names.str.contains(self._INDEX_RE, na=False))
+            return sorted(names[mask].unique().tolist())
+
         try:
-            nfo = self.kite.instruments('NFO')
-            fo_set = {inst['name'] for inst in nfo 
-                     if inst.get('instrument_type') == 'FUT' and inst.get('name') 
-                     and not any(idx in inst['name'] for idx in self.INDEX_SYMBOLS)}
-            self._fo_stocks = sorted(fo_set)
-            return self._fo_stocks
+            self._fo_stocks = load_daily('fo_stocks', build)
         except Exception as e:
-            logger.error(f"FO stocks failed: {e}")
-            return []
+            logger.error("FO stocks failed: %s", e)
+
+    def get_fo_stocks(self) -> List[str]:
+        _preload_threads['fo_stocks'].join()
+        if self._fo_stocks is None:
+            self._load_fo_stocks()
+        return self._fo_stocks or []
 
     def is_above_all_tc(self, price: float, d_tc: float, w_tc: float, m_tc: float) -> bool:
         return price > d_tc > w_tc > m_tc
@@ -274,11 +467,12 @@ class CPRFilterService:
             return self.CROSS_BELOW_WEEKLY
         return None
 
-    def process_stock(self, symbol: str) -> Optional[Dict]:
+    def process_stock(self, symbol: str, quote: Optional[Dict] = None,
+                      dates: Optional[RunDates] = None) -> Optional[Dict]:
         try:
-            cpr = self.calc_cpr_levels(symbol)
+            cpr = self.calc_cpr_levels(symbol, quote, dates)
             if not cpr:
-                logger.debug(f"{symbol}: No CPR levels")
+                logger.debug("%s: No CPR levels", symbol)
                 return None
             
             primary_status = self.evaluate_status(cpr)
@@ -302,7 +496,7 @@ class CPRFilterService:
                     'w_gap': gaps[1],
                     'm_gap': gaps[2]
                 }
-                logger.debug(f"{symbol}: {primary_status}")
+                logger.debug("%s: %s", symbol, primary_status)
 
             if weekly_cross_status:
                 cross_gaps = self.calc_gaps(cpr.current_price, weekly_cross_status, cpr)
@@ -326,13 +520,14 @@ class CPRFilterService:
 
             return payloads if payloads['signal'] or payloads['weekly_cross'] else None
         except Exception as e:
-            logger.error(f"Error processing {symbol}: {e}")
+            logger.error("Error processing %s: %s", symbol, e)
             return None
 
     def filter_cpr_stocks(self) -> FilterResult:
+        prune_disk_cache()
         stocks = self.get_fo_stocks()
         # stocks = ["COLPAL"]
-        logger.info(f"Filtering {len(stocks)} F&O stocks (cache size: {len(self._historical_data_cache)})...")
+        logger.info("Filtering %d F&O stocks (cache size: %d)...", len(stocks), len(self._historical_data_cache))
         
         signals: List[Dict] = []
         cross_above: List[Dict] = []
@@ -341,8 +536,11 @@ class CPRFilterService:
         failed = 0
         start_time = time.time()
         
+        quotes = self.fetch_current_prices(stocks)
+        dates = self.run_dates()
+        
         with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
-            futures = {executor.submit(self.process_stock, symbol): symbol for symbol in stocks}
+            futures = {executor.submit(self.process_stock, symbol, quotes.get(symbol), dates): symbol for symbol in stocks}
             for future in as_completed(futures):
                 symbol = futures[future]
                 try:
@@ -359,23 +557,27 @@ class CPRFilterService:
                     processed += 1
                     if processed % 10 == 0:
                         elapsed = time.time() - start_time
-                        logger.info(f"Progress: {processed}/{len(stocks)} ({failed} failed) in {elapsed:.1f}s")
+                        logger.info("Progress: %d/%d (%d failed) in %.1fs", processed, len(stocks), failed, elapsed)
                 except Exception as e:
-                    logger.debug(f"Stock {symbol} failed: {e}")
+                    logger.debug("Stock %s failed: %s", symbol, e)
                     failed += 1
                     processed += 1
         
         total_time = time.time() - start_time
         logger.info(
-            f"Filter complete: {len(signals)} match criteria, "
-            f"{len(cross_above)} crossed above weekly CPR, {len(cross_below)} crossed below weekly CPR "
-            f"({failed} failed) in {total_time:.1f}s. Cache: {len(self._historical_data_cache)} entries"
+            "Filter complete: %d match criteria, %d crossed above weekly CPR, %d crossed below weekly CPR "
+            "(%d failed) in %.1fs. Cache: %d entries",
+            len(signals), len(cross_above), len(cross_below),
+            failed, total_time, len(self._historical_data_cache)
         )
+        by_symbol = itemgetter('symbol')
+        for results in (signals, cross_above, cross_below):
+            results.sort(key=by_symbol)
         return {
-            'signals': sorted(signals, key=lambda x: x['symbol']),
+            'signals': signals,
             'weekly_cross': {
-                'crossed_above': sorted(cross_above, key=lambda x: x['symbol']),
-                'crossed_below': sorted(cross_below, key=lambda x: x['symbol'])
+                'crossed_above': cross_above,
+                'crossed_below': cross_below
             }
         }
 
@@ -383,3 +585,27 @@ class CPRFilterService:
         with self._cache_lock:
             self._historical_data_cache.clear()
             logger.info("Cache cleared")
+
+    def clear_disk_cache(self):
+        removed = 0
+        for path in glob.glob(os.path.join(_HIST_CACHE_DIR, '*.pkl')):
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError as e:
+                logger.warning("Could not remove %s: %s", path, e)
+        logger.info("Disk cache cleared (%d files)", removed)
+
+
+if __name__ == '__main__':
+    # One-shot run for OS-level schedulers (systemd timer / cron); see app/scheduler.py
+    now = datetime.now()
+    if now.weekday() >= 5 or not (now.replace(hour=9, minute=15, second=0) <= now <= now.replace(hour=15, minute=40, second=59)):
+        logger.info("Outside market hours, skipping CPR filter run")
+    else:
+        result = CPRFilterService().filter_cpr_stocks()
+        weekly = cast(WeeklyCrossPayload, result['weekly_cross'])
+        logger.info(
+            "CPR filter run: %d signals, %d crossed above, %d crossed below",
+            len(result['signals']), len(weekly['crossed_above']), len(weekly['crossed_below'])
+        )
@@ -2,13 +2,13 @@ import logging
 from datetime import datetime, timedelta
 import time
 import random
+from app.utils.nfo_cache import get_nfo
 from service.kite_service import KiteService
+from service.rate_limiter import kite_rate_limit
 from typing import Tuple, Dict, Any, List, Optional, Union
 import pytz
 from concurrent.futures import ThreadPoolExecutor
 import threading
-import json
-import os
 
 class OptionsChartService:
     def __init__(self, kite_instance):
@@ -16,62 +16,22 @@ class OptionsChartService:
         # Cache for historical data - {(ce_token, pe_token, timeframe): (ce_data, pe_data)}
         self._chart_data_cache: Dict[Tuple[int, int, str], Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]] = {}
         self._cache_lock = threading.Lock()
-        # Cache for instruments - {expiry: instruments}
-        self._instruments_cache: Dict[str, List[Dict[str, Any]]] = {}
-        self._instruments_lock = threading.Lock()
-        self._instruments_expiry = 0  # Timestamp when instruments cache expires (1 hour)
-        # Simple request spacing to avoid hitting Kite rate limits across threads
-        self._rate_lock = threading.Lock()
-        self._last_request_ts = 0.0
-        # Disk cache path
-        self._nfo_cache_file = os.path.join(os.path.dirname(__file__), '..', '.cache', 'nfo_instruments.json')
-        os.makedirs(os.path.dirname(self._nfo_cache_file), exist_ok=True)
         # Pre-cache timezone for repeated use
         self._ist = pytz.timezone('Asia/Kolkata')
 
-    def _respect_rate_limit(self, min_gap_seconds: float = 0.25):
-        """Ensure a minimum gap between outbound Kite API requests.
+    def _respect_rate_limit(self, kind: str = 'default'):
+        """Wait for a token from the shared per-endpoint Kite rate limiter.
         This is a coarse client-side throttle to reduce 429s.
         """
-        with self._rate_lock:
-            now = time.time()
-            elapsed = now - self._last_request_ts
-            if elapsed < min_gap_seconds:
-                time.sleep(min_gap_seconds - elapsed)
-            self._last_request_ts = time.time()
+        kite_rate_limit(kind)
     
-    def _load_nfo_from_disk_cache(self) -> Optional[List[Dict[str, Any]]]:
-        """Load NFO instruments from disk cache if available and recent."""
-        try:
-            if os.path.exists(self._nfo_cache_file):
-                stat = os.stat(self._nfo_cache_file)
-                age = time.time() - stat.st_mtime
-                # Cache is valid if less than 24 hours old
-                if age < 86400:
-                    with open(self._nfo_cache_file, 'r') as f:
-                        data = json.load(f)
-                    logging.info(f"✓ Loaded NFO instruments from disk cache ({age/3600:.1f}h old, {len(data)} records)")
-                    return data
-        except Exception as e:
-            logging.warning(f"Error loading disk cache: {e}")
-        return None
-    
-    def _save_nfo_to_disk_cache(self, instruments: List[Dict[str, Any]]) -> None:
-        """Save NFO instruments to disk cache."""
-        try:
-            with open(self._nfo_cache_file, 'w') as f:
-                json.dump(instruments, f)
-            logging.info(f"✓ Saved {len(instruments)} NFO instruments to disk cache")
-        except Exception as e:
-            logging.warning(f"Error saving to disk cache: {e}")
-
     def _historical_with_retry(self, instrument_token: int, from_date: datetime, to_date: datetime, interval: str, max_retries: int = 5):
         """Call kite.historical_data with exponential backoff, jitter, and basic 429 handling."""
         from kiteconnect.exceptions import NetworkException
         attempt = 0
         while True:
             try:
-                self._respect_rate_limit()
+                self._respect_rate_limit('historical')
                 return self.kite_service.kite.historical_data(
                     instrument_token=int(instrument_token),
                     from_date=from_date,
@@ -96,7 +56,7 @@ class OptionsChartService:
         attempt = 0
         while True:
             try:
-                self._respect_rate_limit()
+                self._respect_rate_limit('quote')
                 return self.kite_service.kite.quote(tokens)
             except NetworkException as e:
                 if attempt >= max_retries:
@@ -158,33 +118,8 @@ class OptionsChartService:
         start_time = time_module.time()
         
         try:
-            # STEP 1: Load NFO instruments (try disk cache first, then Kite API)
-            instruments = None
-            
-            # Try disk cache first (24h validity)
-            instruments = self._load_nfo_from_disk_cache()
-            
-            if not instruments:
-                # Try memory cache (1h validity)
-                now = time_module.time()
-                with self._instruments_lock:
-                    if self._instruments_cache.get('NFO') and now < self._instruments_expiry:
-                        instruments = self._instruments_cache['NFO']
-                        logging.info(f"✓ Using memory-cached NFO instruments ({len(instruments)} records)")
-                
-                # If still no cache, fetch from Kite
-                if not instruments:
-                    logging.info("Fetching NFO instruments from Kite API (5-10s)...")
-                    fetch_start = time_module.time()
-                    instruments = self.kite_service.kite.instruments("NFO")
-                    fetch_time = time_module.time() - fetch_start
-                    logging.info(f"✓ Fetched NFO from API in {fetch_time:.1f}s ({len(instruments)} records)")
-                    
-                    # Save to both caches
-                    with self._instruments_lock:
-                        self._instruments_cache['NFO'] = instruments
-                        self._instruments_expiry = now + 3600
-                    self._save_nfo_to_disk_cache(instruments)
+            # STEP 1: Load NFO instruments (memory, then today's disk copy, then Kite API)
+            instruments = get_nfo(self.kite_service.kite)
             
             # STEP 2: Filter to symbol + expiry (FAST - no API call)
             symbol_upper = symbol.upper()
@@ -325,7 +260,7 @@ class OptionsChartService:
     def get_tokens_for_strikes(self, symbol: str, ce_strike: float, pe_strike: float) -> Tuple[Optional[int], Optional[int]]:
         """Get CE and PE instrument tokens for given strike prices."""
         try:
-            instruments = self.kite_service.kite.instruments("NFO")
+            instruments = get_nfo(self.kite_service.kite)
             
             symbol_instruments = [
                 inst for inst in instruments
@@ -506,7 +441,6 @@ class OptionsChartService:
         
         try:
             ce_token_int, pe_token_int = int(tokens[0]), int(tokens[1])
-            self._respect_rate_limit(min_gap_seconds=0.35)
             quotes = self._quote_with_retry([ce_token_int, pe_token_int])
             
             if not quotes or not isinstance(quotes, dict):
@@ -578,7 +512,6 @@ class OptionsChartService:
                     self._historical_with_retry,
                     int(ce_token), from_date, to_date, kite_timeframe
                 )
-                self._respect_rate_limit(min_gap_seconds=0.25)
                 pe_future = executor.submit(
                     self._historical_with_retry,
                     int(pe_token), from_date, to_date, kite_timeframe
@@ -0,0 +1,37 @@
+import threading
+import time
+from typing import Dict
+
+
+class TokenBucket:
+    """Thread-safe token bucket: bursts up to ``rate`` calls, then refills at ``rate``/s."""
+    __slots__ = ('rate', '_tokens', '_stamp', '_cond')
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._stamp = time.monotonic()
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                # wait() drops the lock, so other threads can take tokens meanwhile
+                self._cond.wait((1 - self._tokens) / self.rate)
+
+
+# Kite Connect's published per-endpoint limits (requests/second). The limits
+# apply per API key, so every service in the process draws from these buckets.
+KITE_RATE_LIMITS = {'historical': 3.0, 'quote': 1.0, 'default': 10.0}
+_kite_buckets: Dict[str, TokenBucket] = {kind: TokenBucket(rate) for kind, rate in KITE_RATE_LIMITS.items()}
+
+
+def kite_rate_limit(kind: str = 'default') -> None:
+    """Block until a Kite request of ``kind`` ('historical', 'quote', 'default') may go out."""
+    _kite_buckets[kind].acquire()
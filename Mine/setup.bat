@@ -67,10 +67,10 @@ if not exist ".env" (
     echo .env file found
 )
 
-REM Run syntax check
+REM Run syntax check (also prebakes bytecode so the first start skips compilation)
 echo.
-echo Running syntax validation...
-python -m py_compile app\__init__.py app\config.py app\extensions.py
+echo Running syntax validation and precompiling bytecode...
+python -m compileall -q app service strategy run.py cpr_filter_service.py strategy_backtest.py
 if %errorlevel% neq 0 (
     echo Syntax validation failed
     pause
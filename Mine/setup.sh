@@ -62,10 +62,10 @@ else
     echo "✓ .env file found"
 fi
 
-# Run syntax check
+# Run syntax check (also prebakes bytecode so the first start skips compilation)
 echo ""
-echo "ℹ Running syntax validation..."
-python -m py_compile app/__init__.py app/config.py app/extensions.py
+echo "ℹ Running syntax validation and precompiling bytecode..."
+python -m compileall -q app service strategy run.py cpr_filter_service.py strategy_backtest.py
 if [ $? -eq 0 ]; then
     echo "✓ Syntax validation passed"
 else
@@ -0,0 +1,7 @@
+"""Shared pytest setup: import the app from the repo root in testing mode."""
+import os
+import sys
+
+os.environ.setdefault('FLASK_ENV', 'testing')
+os.environ.setdefault('ENABLE_SCHEDULER', '0')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,76 @@
+"""Tests for the app factory and response helpers."""
+import os
+import subprocess
+import sys
+
+import pytest
+from flask import Flask, Response
+
+from app import create_app
+from app.config import TestingConfig
+from app.routes.api import etagged
+
+
+@pytest.fixture
+def app():
+    return create_app(TestingConfig)
+
+
+def test_blueprints_registered_eagerly(app):
+    assert set(app.blueprints) == {'pages', 'api', 'auth'}
+    rules = {rule.rule for rule in app.url_map.iter_rules()}
+    assert {'/', '/api/symbols', '/api/cpr-filter', '/auth/login'} <= rules
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setenv('API_KEY', 'test-key')
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['access_token'] = 'test-token'
+    return client
+
+
+def test_boot_does_not_import_kiteconnect():
+    # A fresh interpreter: other tests import kiteconnect into this one
+    code = (
+        "import sys\n"
+        "from app import create_app\n"
+        "from app.config import TestingConfig\n"
+        "create_app(TestingConfig)\n"
+        "sys.exit('kiteconnect' in sys.modules)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
+
+
+def test_etag_and_not_modified(client):
+    first = client.get('/api/symbols')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, max-age=60'
+
+    second = client.get('/api/symbols', headers={'If-None-Match': etag})
+    assert second.status_code == 304
+    assert second.data == b''
+    assert second.headers['ETag'] == etag
+
+
+def test_etag_mismatch_returns_body(client):
+    response = client.get('/api/symbols', headers={'If-None-Match': '"stale"'})
+    assert response.status_code == 200
+    assert response.data
+
+
+def test_errors_are_not_etagged(app):
+    response = app.test_client().get('/api/symbols')
+    assert response.status_code == 401
+    assert 'ETag' not in response.headers
+
+
+def test_live_endpoints_always_revalidate():
+    live = Flask(__name__)
+    live.add_url_rule('/ltp', 'ltp', etagged(max_age=0)(lambda: Response(b'{"ltp":1}', mimetype='application/json')))
+    response = live.test_client().get('/ltp')
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    assert response.headers['ETag']
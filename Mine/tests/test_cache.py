@@ -0,0 +1,100 @@
+"""Tests for the sharded CacheManager."""
+import threading
+import time
+
+from app.utils.cache import CacheManager, _decode, _encode
+
+
+def test_redis_payload_round_trip():
+    for value in (b'{"raw":true}', {'a': [1, 2]}, 'text', [1, 'x']):
+        assert _decode(_encode(value)) == value
+
+
+def test_expired_key_is_evicted():
+    cache = CacheManager(ttl=0.05)
+    cache.set('k', 'v')
+    time.sleep(0.1)
+    cache.cleanup_expired()
+    shard = cache._shard('k')
+    assert 'k' not in shard.cache
+    assert shard.expiry_heap == []
+    assert cache.get('k') is None
+
+
+def test_reset_key_survives_stale_heap_entry():
+    cache = CacheManager(ttl=0.2)
+    cache.set('k', 'old')
+    time.sleep(0.1)
+    cache.set('k', 'new')
+    time.sleep(0.15)
+    # The first heap entry is due, but the key was re-set since
+    cache.cleanup_expired()
+    assert cache.get('k') == 'new'
+
+
+def test_racing_get_or_compute_computes_once():
+    cache = CacheManager(ttl=60)
+    calls = []
+    start = threading.Barrier(2)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(cache.get_or_compute('k', loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ['value', 'value']
+    assert cache.get('k') == 'value'
+
+
+def test_get_or_compute_should_cache_veto():
+    cache = CacheManager(ttl=60)
+    assert cache.get_or_compute('k', lambda: [], should_cache=bool) == []
+    assert cache.get('k') is None
+
+
+def test_get_or_compute_error_reaches_waiters_and_is_not_cached():
+    cache = CacheManager(ttl=60)
+    release = threading.Event()
+    errors = []
+
+    def loader():
+        release.wait()
+        raise RuntimeError('upstream down')
+
+    def worker():
+        try:
+            cache.get_or_compute('k', loader)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    owner = threading.Thread(target=worker)
+    owner.start()
+    while 'k' not in cache._inflight:
+        time.sleep(0.001)
+    waiter = threading.Thread(target=worker)
+    waiter.start()
+    release.set()
+    owner.join()
+    waiter.join()
+
+    assert errors == ['upstream down', 'upstream down']
+    assert cache.get_or_compute('k', lambda: 'ok') == 'ok'
+
+
+def test_get_returns_value_within_ttl():
+    cache = CacheManager(ttl=60)
+    cache.set('k', {'a': 1})
+    assert cache.get('k') == {'a': 1}
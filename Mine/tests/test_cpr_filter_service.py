@@ -0,0 +1,207 @@
+"""Tests for CPRFilterService caching and Kite back-off (no network)."""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import pandas as pd
+import pytest
+from kiteconnect.exceptions import NetworkException
+
+import cpr_filter_service as cpr
+from app.utils import nfo_cache
+from app.utils.nfo_cache import get_nfo
+from cpr_filter_service import CPRFilterService
+
+
+class FakeKite:
+    """Stands in for KiteConnect; historical_data() raises queued errors first."""
+
+    def __init__(self, errors=(), candles=None, nfo=None):
+        self.errors = list(errors)
+        self.candles = candles or []
+        self.nfo = nfo or []
+        self.historical_calls = 0
+        self.instrument_calls = []
+
+    def historical_data(self, token, start, end, interval):
+        self.historical_calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.candles
+
+    def instruments(self, exchange=None):
+        self.instrument_calls.append(exchange)
+        return self.nfo if exchange == 'NFO' else []
+
+
+def _frame(day='2024-01-02'):
+    return pd.DataFrame(
+        {'open': [1.0], 'high': [2.0], 'low': [0.5], 'close': [1.5], 'volume': [10.0]},
+        index=pd.DatetimeIndex([day], name='date'),
+    )
+
+
+@pytest.fixture(autouse=True)
+def isolated_caches(monkeypatch, tmp_path):
+    monkeypatch.setattr(cpr, '_global_cache', OrderedDict())
+    monkeypatch.setattr(cpr, '_inflight', {})
+    monkeypatch.setattr(nfo_cache, '_memo', {})
+    monkeypatch.setattr(cpr, '_HIST_CACHE_DIR', str(tmp_path / 'hist'))
+    monkeypatch.setattr(nfo_cache, 'CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(cpr, 'kite_rate_limit', lambda kind='default': None)
+    # Pretend the instrument preload already ran so no threads hit Kite
+    done = threading.Thread(target=lambda: None)
+    done.start()
+    monkeypatch.setattr(cpr, '_preload_threads', {'instruments': done, 'fo_stocks': done})
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(cpr.time, 'sleep', calls.append)
+    return calls
+
+
+def test_disk_frame_round_trip():
+    df = _frame()
+    cpr._write_disk_frame('ABC_70_day_2024-01-02', df)
+    pd.testing.assert_frame_equal(cpr._read_disk_frame('ABC_70_day_2024-01-02'), df)
+    assert cpr._read_disk_frame('missing') is None
+
+
+def test_prune_removes_only_stale_frames(monkeypatch):
+    monkeypatch.setattr(cpr, '_disk_pruned', False)
+    cpr._write_disk_frame('old', _frame())
+    cpr._write_disk_frame('new', _frame())
+    stale = time.time() - cpr._HIST_CACHE_MAX_AGE - 60
+    os.utime(os.path.join(cpr._HIST_CACHE_DIR, 'old.pkl'), (stale, stale))
+    assert cpr.prune_disk_cache() == 1
+    assert cpr._read_disk_frame('old') is None
+    assert cpr._read_disk_frame('new') is not None
+    # Nothing is preloaded into memory
+    assert not cpr._global_cache
+    assert cpr.prune_disk_cache() == 0
+
+
+def test_cached_frame_fetches_once_across_threads():
+    service = CPRFilterService(kite_instance=FakeKite())
+    calls = []
+    start = threading.Barrier(2)
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return _frame()
+
+    results = []
+
+    def worker():
+        start.wait()
+        results.append(service._cached_frame('k', fetch))
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results[0] is results[1]
+    assert cpr._read_disk_frame('k') is not None
+
+
+def test_provisional_frame_is_held_briefly_and_not_persisted():
+    service = CPRFilterService(kite_instance=FakeKite())
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return _frame()
+
+    service._cached_frame('k', fetch, provisional=lambda df: True)
+    service._cached_frame('k', fetch, provisional=lambda df: True)
+    assert len(calls) == 1
+    expires_at = cpr._global_cache['k'][0]
+    assert expires_at - time.monotonic() <= cpr._HIST_PROVISIONAL_TTL
+    assert cpr._read_disk_frame('k') is None
+
+
+def test_holiday_frame_is_cached_provisionally():
+    candles = [{'date': datetime(2024, 1, 25), 'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 10}]
+    kite = FakeKite(candles=candles)
+    service = CPRFilterService(kite_instance=kite)
+    service._token_map = {'ABC': 1}
+    # Friday 2024-01-26 was an exchange holiday: Kite's newest bar is Thursday's
+    as_of = datetime(2024, 1, 26, 12, 0)
+    assert service.get_hist_data('ABC', 70, as_of=as_of) is not None
+    assert service.get_hist_data('ABC', 70, as_of=as_of) is not None
+    assert kite.historical_calls == 1
+    assert cpr._read_disk_frame('ABC_70_day_2024-01-26') is None
+
+
+def test_market_session_date_rolls_back():
+    # Saturday -> Friday; Monday pre-open -> Friday
+    assert cpr._market_session_date(datetime(2024, 1, 6, 12, 0)).isoformat() == '2024-01-05'
+    assert cpr._market_session_date(datetime(2024, 1, 8, 9, 0)).isoformat() == '2024-01-05'
+    assert cpr._market_session_date(datetime(2024, 1, 8, 9, 30)).isoformat() == '2024-01-08'
+
+
+def test_fo_stocks_are_built_from_the_shared_nfo_dump():
+    kite = FakeKite(nfo=[
+        {'name': 'INFY', 'instrument_type': 'FUT'},
+        {'name': 'INFY', 'instrument_type': 'CE'},
+        {'name': 'NIFTY', 'instrument_type': 'FUT'},
+        {'name': 'ACC', 'instrument_type': 'FUT'},
+    ])
+    service = CPRFilterService(kite_instance=kite)
+    assert service.get_fo_stocks() == ['ACC', 'INFY']
+    # The options routes read the same memoized dump
+    assert get_nfo(kite) is get_nfo(FakeKite())
+    assert kite.instrument_calls == ['NFO']
+
+
+def test_lru_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(cpr, '_HIST_CACHE_MAX_ENTRIES', 2)
+    cpr._cache_put('a', _frame())
+    cpr._cache_put('b', _frame())
+    assert cpr._cache_get('a') is not None
+    cpr._cache_put('c', _frame())
+    assert list(cpr._global_cache) == ['a', 'c']
+
+
+def test_expired_frames_are_dropped():
+    cpr._global_cache['old'] = (time.monotonic() - 1, _frame())
+    assert cpr._cache_get('old') is None
+    cpr._cache_put('new', _frame())
+    assert list(cpr._global_cache) == ['new']
+
+
+def test_429_retries_stop_at_max(sleeps):
+    kite = FakeKite(errors=[NetworkException('Too many requests', code=429)] * 10)
+    service = CPRFilterService(kite_instance=kite)
+    with pytest.raises(NetworkException):
+        service._historical_data(1, '2024-01-01', '2024-01-02', 'day')
+    assert kite.historical_calls == CPRFilterService.HIST_MAX_RETRIES + 1
+    assert len(sleeps) == CPRFilterService.HIST_MAX_RETRIES
+    assert all(0.5 <= s <= 8.0 for s in sleeps)
+    assert sleeps == sorted(sleeps)
+
+
+def test_429_then_success(sleeps):
+    candles = [{'date': datetime(2024, 1, 2), 'open': 1, 'high': 2, 'low': 0.5, 'close': 1.5, 'volume': 10}]
+    kite = FakeKite(errors=[NetworkException('Too many requests', code=429)], candles=candles)
+    service = CPRFilterService(kite_instance=kite)
+    assert service._historical_data(1, '2024-01-01', '2024-01-02', 'day') == candles
+    assert kite.historical_calls == 2
+    assert len(sleeps) == 1
+
+
+def test_other_network_errors_are_not_retried(sleeps):
+    kite = FakeKite(errors=[NetworkException('Gateway timeout', code=504)])
+    service = CPRFilterService(kite_instance=kite)
+    with pytest.raises(NetworkException):
+        service._historical_data(1, '2024-01-01', '2024-01-02', 'day')
+    assert kite.historical_calls == 1
+    assert sleeps == []
@@ -0,0 +1,63 @@
+"""Tests for the daily instrument caches."""
+import pytest
+
+from app.utils import nfo_cache
+from app.utils.nfo_cache import get_nfo, load_daily
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(nfo_cache, '_memo', {})
+    monkeypatch.setattr(nfo_cache, 'CACHE_DIR', str(tmp_path))
+
+
+def test_load_daily_builds_once_and_persists(tmp_path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {'INFY': 408065}
+
+    assert load_daily('tokens', build) == {'INFY': 408065}
+    assert load_daily('tokens', build) == {'INFY': 408065}
+    assert len(calls) == 1
+
+    # A fresh process reads today's pickle instead of rebuilding
+    nfo_cache._memo.clear()
+    assert load_daily('tokens', build) == {'INFY': 408065}
+    assert len(calls) == 1
+    assert len(list(tmp_path.glob('tokens_*.pkl'))) == 1
+
+
+def test_load_daily_does_not_persist_empty(tmp_path):
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {}
+
+    assert load_daily('tokens', build) == {}
+    assert load_daily('tokens', build) == {}
+    assert len(calls) == 2
+    assert list(tmp_path.glob('tokens_*.pkl')) == []
+
+
+def test_load_daily_prunes_earlier_days(tmp_path):
+    (tmp_path / 'tokens_20000101.pkl').write_bytes(b'')
+    (tmp_path / 'other_20000101.pkl').write_bytes(b'')
+    load_daily('tokens', lambda: {'INFY': 408065})
+    assert not (tmp_path / 'tokens_20000101.pkl').exists()
+    assert (tmp_path / 'other_20000101.pkl').exists()
+
+
+def test_get_nfo_downloads_once_per_day():
+    class Kite:
+        calls = 0
+
+        def instruments(self, exchange):
+            Kite.calls += 1
+            return [{'name': 'INFY', 'exchange': exchange}]
+
+    assert get_nfo(Kite()) == [{'name': 'INFY', 'exchange': 'NFO'}]
+    assert get_nfo(Kite()) == [{'name': 'INFY', 'exchange': 'NFO'}]
+    assert Kite.calls == 1
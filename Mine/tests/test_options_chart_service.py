@@ -0,0 +1,44 @@
+"""Tests for OptionsChartService instrument lookups (no network)."""
+from datetime import date
+
+import pytest
+
+from app.utils import nfo_cache
+from service.options_chart_service import OptionsChartService
+
+
+class FakeKite:
+    def __init__(self, nfo):
+        self.nfo = nfo
+        self.instrument_calls = []
+
+    def instruments(self, exchange=None):
+        self.instrument_calls.append(exchange)
+        return self.nfo if exchange == 'NFO' else []
+
+
+def _option(kind, strike, expiry, token):
+    return {'name': 'NIFTY', 'instrument_type': kind, 'strike': strike,
+            'expiry': expiry, 'instrument_token': token}
+
+
+@pytest.fixture(autouse=True)
+def isolated_nfo_cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(nfo_cache, '_memo', {})
+    monkeypatch.setattr(nfo_cache, 'CACHE_DIR', str(tmp_path))
+
+
+def test_lookups_read_the_shared_nfo_dump():
+    kite = FakeKite([
+        _option('CE', 22000.0, date(2024, 1, 25), 1),
+        _option('PE', 21900.0, date(2024, 1, 25), 2),
+        _option('PE', 22000.0, date(2024, 1, 25), 3),
+        _option('CE', 21900.0, date(2024, 1, 25), 4),
+        _option('CE', 22000.0, date(2024, 2, 1), 5),
+    ])
+    service = OptionsChartService(kite)
+    assert service.get_tokens_for_strikes('NIFTY', 22000.0, 21900.0) == (1, 2)
+    assert service.get_tokens_for_strikes('nifty', 22000.0, 21900.0) == (1, 2)
+    strikes = service.get_strikes_for_symbol('NIFTY', skip_pricing=True)['strikes']
+    assert [s['strike'] for s in strikes] == [21900.0, 22000.0]
+    assert kite.instrument_calls.count('NFO') == 1
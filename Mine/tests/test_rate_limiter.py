@@ -0,0 +1,24 @@
+"""Tests for the Kite token bucket."""
+import time
+
+from service.rate_limiter import TokenBucket
+
+
+def test_bucket_allows_initial_burst():
+    bucket = TokenBucket(5)
+    start = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - start < 0.05
+
+
+def test_bucket_refills_at_configured_rate():
+    bucket = TokenBucket(20)
+    for _ in range(20):
+        bucket.acquire()
+    start = time.monotonic()
+    for _ in range(10):
+        bucket.acquire()
+    elapsed = time.monotonic() - start
+    # 10 tokens at 20/s take ~0.5s once the burst is spent
+    assert 0.4 <= elapsed <= 0.8
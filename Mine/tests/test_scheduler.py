@@ -0,0 +1,67 @@
+"""Tests for the Timer-based market scheduler."""
+import threading
+from time import monotonic
+
+import pytest
+from flask import Flask
+
+from app import scheduler as scheduler_module
+from app.extensions import init_extensions
+from app.scheduler import MarketScheduler
+
+
+class RecordingScheduler(MarketScheduler):
+    """Records task runs instead of running the CPR filter."""
+
+    def __init__(self):
+        super().__init__()
+        self.ran = threading.Event()
+
+    def _run_cpr_filter_task(self):
+        self.ran.set()
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(scheduler_module, '_seconds_until_next_boundary', lambda interval: 0.05)
+    sched = RecordingScheduler()
+    yield sched
+    sched.stop()
+
+
+def test_tick_runs_task_and_rearms(scheduler):
+    scheduler.start()
+    first_timer = scheduler._timer
+    assert scheduler.ran.wait(1)
+    # Re-armed before the task ran
+    assert scheduler._timer is not first_timer
+    assert scheduler._timer.is_alive()
+
+
+def test_late_tick_is_skipped(scheduler):
+    scheduler.running = True
+    scheduler._expected_at = monotonic() - MarketScheduler.MISFIRE_GRACE_SECONDS - 1
+    scheduler._tick()
+    assert not scheduler.ran.is_set()
+    assert scheduler._timer is not None
+
+
+def test_stop_cancels_timer(scheduler):
+    scheduler.start()
+    timer = scheduler._timer
+    scheduler.stop()
+    timer.join(1)
+    assert not scheduler.running
+    assert scheduler._timer is None
+    assert not timer.is_alive()
+
+
+def test_scheduler_starts_once_and_only_when_enabled(monkeypatch):
+    started = []
+    monkeypatch.setattr(MarketScheduler, 'start', lambda self: started.append(1))
+    monkeypatch.setattr(scheduler_module, '_started', threading.Event())
+    for enabled in (False, True, True):
+        app = Flask(__name__)
+        app.config['ENABLE_SCHEDULER'] = enabled
+        init_extensions(app)
+    assert started == [1]